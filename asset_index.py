@@ -0,0 +1,98 @@
+# asset_index.py
+
+import os
+import re
+import threading
+from typing import Union, Dict, List, Tuple
+
+import profiler
+
+# --- CONSTANTS ---
+# Why: The stem is matched greedily up to the last non-digit, so 'rat12.aiv' splits into 'rat' and '12'.
+AIV_FILENAME_PATTERN = re.compile(r"^(.*\D)(\d+)\.aiv$")
+
+
+class AssetIndex:
+    """
+    A case-insensitive index of one resource folder, built from a single os.scandir call.
+    Why: Many characters (and AIC packs) query the same speech/binks/AIV folders. Scanning each folder
+         once replaces thousands of repeated listdir/exists calls with dictionary lookups.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.exists = False
+        self.files: List[str] = []  # Kept in scan order, which matches os.listdir.
+        self.subdirs: List[str] = []
+        self._files_exact = set()
+        self._files_lower: Dict[str, str] = {}
+        self._dirs_exact = set()
+        self._dirs_lower: Dict[str, str] = {}
+        self._aiv_by_stem: Dict[str, List[Tuple[str, str]]] = {}
+        self._prefix_cache: Dict[str, List[str]] = {}
+        profiler.count("scandir")
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        self.subdirs.append(entry.name)
+                        self._dirs_exact.add(entry.name)
+                        self._dirs_lower.setdefault(entry.name.lower(), entry.name)
+                    else:
+                        self._add_file(entry.name)
+            self.exists = True
+        except OSError:
+            pass
+
+    def _add_file(self, filename: str):
+        self.files.append(filename)
+        self._files_exact.add(filename)
+        lower_name = filename.lower()
+        self._files_lower.setdefault(lower_name, filename)
+        aiv_match = AIV_FILENAME_PATTERN.match(lower_name)
+        if aiv_match:
+            self._aiv_by_stem.setdefault(aiv_match.group(1), []).append((aiv_match.group(2), filename))
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.root, filename)
+
+    def find(self, filename: str) -> Union[str, None]:
+        """Returns the actual name of a file, preferring an exact match over a case-insensitive one."""
+        if filename in self._files_exact: return filename
+        return self._files_lower.get(filename.lower())
+
+    def find_dir(self, dirname: str) -> Union[str, None]:
+        """Returns the full path of a subfolder, preferring an exact match over a case-insensitive one."""
+        if dirname in self._dirs_exact: return self.path(dirname)
+        actual_name = self._dirs_lower.get(dirname.lower())
+        return self.path(actual_name) if actual_name else None
+
+    def files_with_prefix(self, prefix: str) -> List[str]:
+        """Returns all files whose lowercased name starts with the given lowercase prefix, in scan order."""
+        if prefix not in self._prefix_cache:
+            self._prefix_cache[prefix] = [f for f in self.files if f.lower().startswith(prefix)]
+        return self._prefix_cache[prefix]
+
+    def aiv_files(self, stem: str) -> List[Tuple[str, str]]:
+        """Returns (number, filename) pairs for all '<stem><number>.aiv' files, in scan order."""
+        return self._aiv_by_stem.get(stem.lower(), [])
+
+
+# --- INDEX REGISTRY ---
+_INDEX_CACHE: Dict[str, AssetIndex] = {}
+_INDEX_LOCK = threading.Lock()
+
+def get_index(root: Union[str, None]) -> AssetIndex:
+    """Returns the cached index for a folder, scanning it on first use. A missing folder yields an empty index."""
+    key = os.path.normpath(root) if root else ""
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+        if index is None:
+            index = _INDEX_CACHE[key] = AssetIndex(root) if root else AssetIndex("")
+        return index
+
+def invalidate(root: Union[str, None] = None):
+    """Drops the cached index of one folder, or of all folders when no root is given."""
+    with _INDEX_LOCK:
+        if root is None: _INDEX_CACHE.clear()
+        else: _INDEX_CACHE.pop(os.path.normpath(root), None)
@@ -0,0 +1,87 @@
+# asset_linker.py
+
+import os
+import shutil
+from typing import Union
+
+import profiler
+
+try:
+    import fcntl
+except ImportError:  # Why: fcntl does not exist on Windows, where reflinks are simply skipped.
+    fcntl = None
+
+# --- CONSTANTS ---
+LINK_MODES = ["copy", "hardlink", "reflink", "symlink", "auto"]
+# Why: This is the Linux FICLONE ioctl request number (_IOW(0x94, 9, int)) used by 'cp --reflink'.
+FICLONE = 0x40049409
+
+
+# --- HELPER FUNCTIONS ---
+
+def _try_reflink(source_file: str, target_file: str) -> bool:
+    """Shares the data blocks of the source with the target on copy-on-write filesystems (Btrfs, XFS, ...)."""
+    if fcntl is None: return False
+    try:
+        with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+
+def _try_kernel_copy(source_file: str, target_file: str) -> Union[str, None]:
+    """Copies the file inside the kernel without passing the data through Python buffers."""
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method): continue
+        try:
+            with open(source_file, 'rb') as src, open(target_file, 'wb') as dst:
+                size, offset = os.fstat(src.fileno()).st_size, 0
+                while offset < size:
+                    if method == "copy_file_range":
+                        sent = os.copy_file_range(src.fileno(), dst.fileno(), size - offset)
+                    else:
+                        sent = os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                    if sent == 0: break
+                    offset += sent
+            if offset == size: return method
+        except OSError:
+            continue
+    return None
+
+
+# --- MAIN ENTRY POINT ---
+
+def materialize_file(source_file: str, target_file: str, link_mode: str = "copy") -> str:
+    """
+    Places the content of source_file at target_file using the requested link mode.
+    Returns the method that was actually used, falling back to a normal copy whenever the
+    filesystem cannot share data (e.g. hardlinks across drives or reflinks on ext4).
+    """
+    # Why: An existing target may be a hardlink or symlink to the source from a previous run.
+    #      Writing through it would truncate the source, so it is always replaced instead.
+    profiler.count("exists")
+    if os.path.lexists(target_file):
+        os.remove(target_file)
+
+    if link_mode == "hardlink":
+        try:
+            os.link(source_file, target_file)
+            return "hardlink"
+        except OSError:
+            pass
+    elif link_mode == "symlink":
+        try:
+            os.symlink(os.path.abspath(source_file), target_file)
+            return "symlink"
+        except OSError:
+            pass
+    elif link_mode in ("reflink", "auto"):
+        used_method = "reflink" if _try_reflink(source_file, target_file) else None
+        if not used_method and link_mode == "auto":
+            used_method = _try_kernel_copy(source_file, target_file)
+        if used_method:
+            shutil.copystat(source_file, target_file)
+            return used_method
+
+    shutil.copy2(source_file, target_file)
+    return "copy"
@@ -0,0 +1,79 @@
+# asset_pool.py
+
+import os
+import threading
+from typing import Dict, Tuple
+
+import profiler
+from asset_linker import materialize_file
+from build_manifest import hash_file
+
+# --- CONSTANTS ---
+# Why: The pool lives next to 'resources/ai' (on the same drive), so its blobs can be hardlinked into the output.
+ASSET_POOL_DIRNAME = "ai_asset_pool"
+
+
+class AssetPool:
+    """
+    A content-addressed store that keeps every distinct asset exactly once.
+    Why: Many characters use byte-identical media (the shared 'all_*.wav' files, 'bad_soldier_*.bik',
+         and remakes of the same lord across AIC packs). Each source is hashed once, each distinct
+         content is stored once, and every output file is a hardlink to its blob, so disk usage and
+         copy time scale with the unique content instead of the number of characters.
+    """
+
+    def __init__(self, root: str, link_mode: str = "copy"):
+        self.root = root
+        # The link mode is used to fill the pool from the sources; outputs are always hardlinked to the pool.
+        self.link_mode = link_mode
+        self._lock = threading.Lock()
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self._blob_locks: Dict[str, threading.Lock] = {}
+        self.blobs_stored = 0
+        self.bytes_stored = 0
+        self.files_placed = 0
+        self.bytes_placed = 0
+
+    def _digest(self, source_file: str) -> Tuple[str, int]:
+        """Returns the content hash and size of a source file, hashing each unchanged file only once."""
+        stat = os.stat(source_file)
+        key = (os.path.abspath(source_file), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(key)
+        if digest is None:
+            digest = hash_file(source_file)
+            with self._lock:
+                self._digests[key] = digest
+        return digest, stat.st_size
+
+    def store(self, source_file: str) -> str:
+        """Adds the content of a source file to the pool (if it is not there yet) and returns the blob path."""
+        digest, size = self._digest(source_file)
+        extension = os.path.splitext(source_file)[1].lower()
+        blob_path = os.path.join(self.root, digest[:2], digest + extension)
+        with self._lock:
+            blob_lock = self._blob_locks.setdefault(blob_path, threading.Lock())
+        # Why: Two workers may place the same content at once; only the first one writes the blob.
+        with blob_lock:
+            profiler.count("exists")
+            if not os.path.isfile(blob_path) or os.path.getsize(blob_path) != size:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                materialize_file(source_file, blob_path, self.link_mode)
+                with self._lock:
+                    self.blobs_stored += 1
+                    self.bytes_stored += size
+        return blob_path
+
+    def place(self, source_file: str, target_file: str) -> str:
+        """Places a source file at the target as a hardlink to its pooled blob and returns the method used."""
+        blob_path = self.store(source_file)
+        used_method = materialize_file(blob_path, target_file, "hardlink")
+        with self._lock:
+            self.files_placed += 1
+            self.bytes_placed += os.path.getsize(blob_path)
+        return "pool-hardlink" if used_method == "hardlink" else "pool-" + used_method
+
+    def summary(self) -> str:
+        mib = 1024 * 1024
+        return (f"Asset pool: {self.files_placed} files ({self.bytes_placed / mib:.1f} MiB) placed from pooled content, "
+                f"{self.blobs_stored} new blobs ({self.bytes_stored / mib:.1f} MiB) stored in '{self.root}'.")
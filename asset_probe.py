@@ -0,0 +1,161 @@
+# asset_probe.py
+
+import os
+import json
+import struct
+import posixpath
+import threading
+from typing import Union, Dict, List, Tuple
+
+import profiler
+
+# --- CONSTANTS ---
+PROBE_MODES = ["off", "flag", "skip"]
+BIK_SIGNATURES = (b"BIK", b"KB2")
+BIK_HEADER_SIZE = 36
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# A RIFF file is walked chunk by chunk until 'fmt ' and 'data' are found; real files need two or three steps.
+MAX_RIFF_CHUNKS = 64
+
+
+# --- PROBES ---
+# Each probe reads only a few header bytes and returns the facts it found, or raises ValueError for a corrupt file.
+
+def _probe_bik(f, file_size: int) -> Dict:
+    header = f.read(BIK_HEADER_SIZE)
+    if len(header) < BIK_HEADER_SIZE or header[:3] not in BIK_SIGNATURES: raise ValueError("not a Bink video")
+    stored_size, frames, _, _, width, height, rate, scale = struct.unpack_from("<8I", header, 4)
+    if stored_size + 8 > file_size: raise ValueError(f"truncated: the header announces {stored_size + 8} bytes, the file has {file_size}")
+    info = {"frames": frames, "width": width, "height": height}
+    if rate and scale: info["duration"] = round(frames * scale / rate, 3)
+    return info
+
+def _probe_wav(f, file_size: int) -> Dict:
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE": raise ValueError("not a RIFF/WAVE file")
+    riff_size = struct.unpack_from("<I", header, 4)[0]
+    if riff_size + 8 > file_size: raise ValueError(f"truncated: the RIFF header announces {riff_size + 8} bytes, the file has {file_size}")
+    info, offset, byte_rate, data_size = {}, 12, None, None
+    for _ in range(MAX_RIFF_CHUNKS):
+        f.seek(offset)
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8: break
+        chunk_id, chunk_size = chunk_header[:4], struct.unpack_from("<I", chunk_header, 4)[0]
+        if offset + 8 + chunk_size > file_size: raise ValueError(f"truncated: the '{chunk_id.decode('latin-1')}' chunk ends after the end of the file")
+        if chunk_id == b"fmt ":
+            fmt = f.read(16)
+            if len(fmt) < 16: raise ValueError("the 'fmt ' chunk is too short")
+            _, channels, sample_rate, byte_rate, _, bits = struct.unpack("<HHIIHH", fmt)
+            info.update(channels=channels, sample_rate=sample_rate, bits=bits)
+        elif chunk_id == b"data":
+            data_size = chunk_size
+        if byte_rate is not None and data_size is not None: break
+        offset += 8 + chunk_size + (chunk_size & 1)  # Chunks are padded to an even size.
+    if byte_rate is None: raise ValueError("no 'fmt ' chunk")
+    if data_size is None: raise ValueError("no 'data' chunk")
+    if byte_rate: info["duration"] = round(data_size / byte_rate, 3)
+    return info
+
+def _probe_png(f, file_size: int) -> Dict:
+    header = f.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE: raise ValueError("not a PNG image")
+    length, chunk_type, width, height = struct.unpack(">I4sII", header[8:24])
+    if chunk_type != b"IHDR" or length != 13: raise ValueError("the IHDR chunk is missing")
+    if not width or not height: raise ValueError(f"invalid dimensions {width}x{height}")
+    # Why: The IEND chunk closes every PNG, so its absence is a cheap sign of a truncated file.
+    f.seek(max(file_size - 12, 0))
+    if f.read(12)[4:8] != b"IEND": raise ValueError("truncated: the IEND chunk is missing")
+    return {"width": width, "height": height}
+
+PROBES = {".bik": _probe_bik, ".wav": _probe_wav, ".png": _probe_png}
+
+def probe_file(path: str) -> Dict:
+    """Checks one asset file by its header only and returns its kind, size, problem (None if it is fine) and media facts."""
+    extension = os.path.splitext(path)[1].lower()
+    result = {"kind": extension.lstrip("."), "size": 0, "problem": None}
+    try:
+        result["size"] = file_size = os.path.getsize(path)
+        if not file_size: raise ValueError("empty file")
+        probe = PROBES.get(extension)
+        if probe:
+            profiler.count("read")
+            with open(path, 'rb') as f:
+                result.update(probe(f, file_size))
+    except (OSError, ValueError, struct.error) as e:
+        result["problem"] = str(e)
+    return result
+
+
+class AssetProber:
+    """
+    Probes the source files of asset plans and flags or drops corrupt ones.
+    Why: A truncated video or a mislabeled image would otherwise only show up in game. Reading a few header
+         bytes per file keeps the check cheap enough to run on every conversion.
+    """
+
+    def __init__(self, mode: str = "flag"):
+        self.mode = mode
+        self.results: Dict[str, Dict] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+
+    def probe(self, path: str) -> Dict:
+        """Probes a file once for as long as its size and modification time stay the same, and reports a problem once."""
+        profiler.count("stat")
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        with self._lock:
+            if path in self.results and self._signatures.get(path) == signature: return self.results[path]
+        result = probe_file(path)
+        with self._lock:
+            self.results[path], self._signatures[path] = result, signature
+        if result["problem"]:
+            action = "skipped" if self.mode == "skip" else "copied anyway"
+            print(f"  Warning: '{path}' looks corrupt ({result['problem']}); {action}.")
+        return result
+
+    def screen(self, copies: List[list], mapping_file: Union[str, None], mappings: Dict) -> Tuple[List[list], Dict, bool]:
+        """
+        Probes the sources of [source, relpath] copies. In 'skip' mode, corrupt sources are dropped together with the
+        mapping entries that point to their destination. Returns the copies, the mappings and whether anything was dropped.
+        """
+        corrupt = [copy for copy in copies if self.probe(copy[0])["problem"]]
+        if self.mode != "skip" or not corrupt: return copies, mappings, False
+        kept_copies = [copy for copy in copies if copy not in corrupt]
+        lost_targets = {relpath for _, relpath in corrupt} - {relpath for _, relpath in kept_copies}
+        mapping_dir = posixpath.dirname(mapping_file or "")
+        kept_mappings = {key: filename for key, filename in mappings.items() if posixpath.join(mapping_dir, filename) not in lost_targets}
+        return kept_copies, kept_mappings, True
+
+    def summary(self) -> str:
+        problems = sum(1 for result in self.results.values() if result["problem"])
+        return f"Probed {len(self.results)} asset files: {problems} look corrupt" + (" and were skipped." if problems and self.mode == "skip" else ".")
+
+    def write_report(self, output_path: str):
+        """Writes the probe result of every asset file (with durations and dimensions) as a JSON sidecar report."""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({"mode": self.mode, "files": dict(sorted(self.results.items()))}, f, indent=2, ensure_ascii=False)
+        print(f"Asset report written to '{output_path}'.")
+
+
+# --- MODULE-LEVEL ACCESS ---
+# Why: Like the profiler, the prober is switched on once for the whole run; with probing off every call site is a None check.
+_ACTIVE: Union[AssetProber, None] = None
+
+def enable(mode: str = "flag") -> Union[AssetProber, None]:
+    global _ACTIVE
+    _ACTIVE = AssetProber(mode) if mode != "off" else None
+    return _ACTIVE
+
+def disable():
+    global _ACTIVE
+    _ACTIVE = None
+
+def active() -> Union[AssetProber, None]:
+    return _ACTIVE
+
+def screen(copies: List[list], mapping_file: Union[str, None], mappings: Dict) -> Tuple[List[list], Dict, bool]:
+    return _ACTIVE.screen(copies, mapping_file, mappings) if _ACTIVE is not None else (copies, mappings, False)
@@ -0,0 +1,432 @@
+# benchmark.py
+
+import os
+import sys
+import json
+import time
+import re
+import random
+import shutil
+import struct
+import zlib
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import importlib.util
+from contextlib import contextmanager, redirect_stdout
+from typing import Callable, Dict, List, Mapping, Union
+
+# Import the converter modules so the benchmark always measures the code of the current checkout.
+import asset_index
+import lines_generator
+import normalization
+import create_character_ucp3 as converter
+from output_sink import DirectorySink
+from shared_utils import FolderMatcher, find_best_folder_match, clear_folder_matcher_cache, sanitize_name
+
+# --- CONFIGURATION CONSTANTS ---
+MOOD_SUFFIXES = ["anger", "taunt", "nervous", "natural"]
+NUM_AIV_FILES_PER_LORD = 8
+# Names with umlauts, punctuation and other whitespace, checked by the name normalization benchmark on top of the corpus names.
+NORMALIZATION_SAMPLES = ["Richard Löwenherz", "König Philipp", "Größenwahn-Ü", "Ärger & Öl!", "Kaiser  Friedrich", "Tab\tName", "Äbt (v2)", "straße_01", ""]
+
+
+# --- CORPUS GENERATION ---
+
+class CorpusWriter:
+    """Writes synthetic input files with deterministic pseudo-random content and keeps simple statistics."""
+
+    def __init__(self, root: str, seed: int):
+        self.root = root
+        self.random = random.Random(seed)
+        self.file_count = 0
+        self.byte_count = 0
+
+    def write_bytes(self, relpath: str, size: int):
+        # Why: Random content keeps the data incompressible, like real bink, wav and png files.
+        self.write_raw(relpath, self.random.getrandbits(size * 8).to_bytes(size, 'little') if size else b"")
+
+    def write_media(self, relpath: str, size: int):
+        """Writes random content behind a valid Bink, RIFF/WAVE or PNG header, so asset probing accepts the file."""
+        extension = os.path.splitext(relpath)[1].lower()
+        header, trailer = b"", b""
+        if extension == ".bik":
+            size = max(size, 36)
+            header = b"BIKi" + struct.pack("<8I", size - 8, 1, 0, 0, 640, 480, 15, 1)
+        elif extension == ".wav":
+            size = max(size, 44)
+            header = b"RIFF" + struct.pack("<I", size - 8) + b"WAVE" + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, 22050, 44100, 2, 16) + b"data" + struct.pack("<I", size - 44)
+        elif extension == ".png":
+            ihdr = b"IHDR" + struct.pack(">IIBBBBB", 64, 64, 8, 2, 0, 0, 0)
+            header = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + ihdr + struct.pack(">I", zlib.crc32(ihdr))
+            trailer = struct.pack(">I", 0) + b"IEND" + struct.pack(">I", zlib.crc32(b"IEND"))
+            size = max(size, len(header) + len(trailer))
+        payload_size = size - len(header) - len(trailer)
+        self.write_raw(relpath, header + (self.random.getrandbits(payload_size * 8).to_bytes(payload_size, 'little') if payload_size else b"") + trailer)
+
+    def write_json(self, relpath: str, data, encoding: str = 'utf-8'):
+        self.write_raw(relpath, json.dumps(data, ensure_ascii=False).encode(encoding))
+
+    def write_raw(self, relpath: str, content: bytes):
+        path = os.path.join(self.root, relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        self.file_count += 1
+        self.byte_count += len(content)
+
+
+def build_cr_sections(ai_names: List[str]) -> List[Dict]:
+    """Builds cr.json sections 79 and 231 in the layout expected by lines_generator.parse_text_blocks."""
+    complete_titles = [f"{name} complete title {j + 1}" for name in ai_names for j in range(lines_generator.NUM_TITLES_PER_AI)]
+    short_titles = []
+    for name in ai_names:
+        short_titles += [name] + [f"{name} title {j + 1}" for j in range(lines_generator.NUM_SHORT_NAME_BLOCK_LINES - 1)]
+    section_79 = ["Header"] * 10 + complete_titles + short_titles + ["Separator", lines_generator.DESCRIPTION_BLOCK_ANCHOR]
+    section_79 += [f"Description of {name}. Very \"dangerous\"." for name in ai_names] + ["Footer"] * 5
+    section_231 = [f"{name} says line {j}" for name in ai_names for j in range(lines_generator.NUM_DIALOGUE_LINES_PER_BLOCK)]
+    filler = [{"SectionIndex": i, "SectionString": [f"Filler text {i}-{j}" for j in range(40)]} for i in range(0, 300, 7)]
+    return filler[:10] + [{"SectionIndex": 79, "SectionString": section_79}] + filler[10:30] + [{"SectionIndex": 231, "SectionString": section_231}] + filler[30:]
+
+def generate_corpus(root: str, num_aic_files: int, wav_bytes: int, bik_bytes: int, png_bytes: int, aiv_bytes: int, seed: int = 0) -> Dict:
+    """
+    Generates a synthetic project tree with the layout described in the README.
+    With one AIC file the single-configuration root folders are used, otherwise the multi-AIC folders.
+    """
+    writer = CorpusWriter(root, seed)
+    lord_names = [converter.TROOP_INDEX_TO_NAME[str(i)] for i in range(1, lines_generator.NUM_AIS + 1)]
+    resources = os.path.join("UCP", "resources")
+
+    troops = {str(i): {"Lord": {"StrengthMultiplier": 100 + i, "DotColour": i}, "normal": {"Units": ["Archer", "Spearman", "Macemen"], "Counts": [i, 2 * i, 3]}, "crusader": {"Units": ["Knight"], "Counts": [i % 4]}, "deathmatch": {"Units": ["Archer"], "Counts": [10]}} for i in range(1, lines_generator.NUM_AIS + 1)}
+    writer.write_raw(os.path.join(resources, "troops", "vanilla.json"), json.dumps(troops).encode('utf-8-sig'))
+
+    is_single_config = num_aic_files == 1
+    for pack_number in range(num_aic_files):
+        pack = f"Pack{pack_number:03d}"
+        # Why: Output folder names must be unique across all packs, so every pack after the first uses custom names.
+        characters = [{"Name": name, "CustomName": f"{pack} {name}" if pack_number else "", "Personality": {"Unknown000": pack_number, "LordIndex": i}} for i, name in enumerate(lord_names)]
+        writer.write_json(os.path.join(resources, "aic", pack + ".json"), {"AICharacters": characters})
+
+        if is_single_config:
+            speech_dir, binks_dir, portraits_dir, cr_path = os.path.join("fx", "speech"), "binks", os.path.join("interface_icons2", "Images"), "cr.json"
+        else:
+            speech_dir, binks_dir, portraits_dir = (os.path.join(resources, kind, pack) for kind in ("speech", "binks", "portraits"))
+            cr_path = os.path.join(resources, "cr", pack, "cr.json")
+
+        for ai_index, name in enumerate(lord_names, start=1):
+            for number in range(1, NUM_AIV_FILES_PER_LORD + 1):
+                writer.write_bytes(os.path.join(resources, "aiv", pack, f"{name.lower()}{number}.aiv"), aiv_bytes)
+            if name in converter.SPECIAL_SPEECH_MAP:
+                for filename in sorted(set(converter.SPECIAL_SPEECH_MAP[name].values())):
+                    writer.write_media(os.path.join(speech_dir, filename), wav_bytes)
+                for filename in sorted(set(converter.BINKS_CONFIG[name]["mapping"].values())):
+                    writer.write_media(os.path.join(binks_dir, filename), bik_bytes)
+            else:
+                prefix = converter.LORD_PREFIX_MAP[name]
+                for stem in converter.FILENAME_STEM_TO_KEY_MAP:
+                    writer.write_media(os.path.join(speech_dir, f"{prefix}_{stem}.wav"), wav_bytes)
+                for mood in MOOD_SUFFIXES:
+                    writer.write_media(os.path.join(binks_dir, f"{converter.BINKS_CONFIG[name]['prefix']}{mood}.bik"), bik_bytes)
+            writer.write_media(os.path.join(speech_dir, f"General_Message{22 + ai_index}.wav"), wav_bytes)
+            writer.write_media(os.path.join(portraits_dir, f"Image{522 + ai_index}.png"), png_bytes)
+            writer.write_media(os.path.join(portraits_dir, f"Image{700 + ai_index}.png"), png_bytes)
+
+        ai_names = [character["CustomName"] or character["Name"] for character in characters]
+        writer.write_raw(cr_path, json.dumps(build_cr_sections(ai_names), ensure_ascii=False).encode('utf-8-sig'))
+
+    return {"aic_files": num_aic_files, "characters": num_aic_files * lines_generator.NUM_AIS, "input_files": writer.file_count, "input_bytes": writer.byte_count}
+
+
+# --- TIMING HELPERS ---
+
+@contextmanager
+def working_directory(path: str):
+    """Temporarily changes the working directory, since the converter uses paths relative to it."""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def reset_caches():
+    """Drops all in-process caches so every measured run starts cold."""
+    asset_index.invalidate()
+    lines_generator.clear_cr_cache()
+    clear_folder_matcher_cache()
+    sanitize_name.cache_clear()
+
+def summarize(runs: List[float]) -> Dict:
+    return {"runs": [round(r, 6) for r in runs], "min": round(min(runs), 6), "median": round(statistics.median(runs), 6), "mean": round(statistics.mean(runs), 6)}
+
+def time_call(func: Callable, repeat: int, setup: Union[Callable, None] = None) -> Dict:
+    """Runs a function several times with its console output discarded and summarizes the wall times."""
+    runs = []
+    with open(os.devnull, 'w') as devnull:
+        for _ in range(repeat):
+            if setup: setup()
+            with redirect_stdout(devnull):
+                start = time.perf_counter()
+                func()
+                runs.append(time.perf_counter() - start)
+    return summarize(runs)
+
+
+# --- STAGE BENCHMARKS ---
+
+def list_subdirs(path: str) -> List[str]:
+    return sorted(d for d in os.listdir(path) if os.path.isdir(os.path.join(path, d))) if os.path.isdir(path) else []
+
+def bench_folder_matching(aic_bases: List[str], output_folders: List[str], ai_names: List[str], repeat: int) -> Dict:
+    """Times the folder matching done by main() and the lines generator, with and without a prebuilt matcher."""
+    asset_folders = [list_subdirs(path) for path in (converter.AIV_INPUT_DIR, converter.PORTRAITS_INPUT_DIR, converter.SPEECH_INPUT_DIR, converter.BINKS_INPUT_DIR, converter.CR_INPUT_DIR)]
+
+    def match_function():
+        for folders in asset_folders:
+            for base in aic_bases: find_best_folder_match(base, folders)
+        for name in ai_names: find_best_folder_match(name, output_folders)
+
+    def match_prebuilt():
+        for folders in asset_folders:
+            matcher = FolderMatcher(folders)
+            for base in aic_bases: matcher.match(base)
+        matcher = FolderMatcher(output_folders)
+        for name in ai_names: matcher.match(name)
+
+    return {"find_best_folder_match": time_call(match_function, repeat, clear_folder_matcher_cache),
+            "FolderMatcher": time_call(match_prebuilt, repeat)}
+
+def bench_process_functions(scratch_dir: str, repeat: int) -> Dict:
+    """Times each process_* function summed over all characters of all AIC files."""
+    aic_files = sorted(f for f in os.listdir(converter.AIC_INPUT_DIR) if f.endswith('.json'))
+    matchers = {key: FolderMatcher(list_subdirs(path)) for key, path in [("aiv", converter.AIV_INPUT_DIR), ("portraits", converter.PORTRAITS_INPUT_DIR), ("speech", converter.SPEECH_INPUT_DIR), ("binks", converter.BINKS_INPUT_DIR)]}
+    jobs = []
+    for filename in aic_files:
+        asset_paths = converter.resolve_asset_paths(os.path.splitext(filename)[0], matchers, len(aic_files) == 1)
+        for character in converter.load_aic_characters(filename):
+            jobs.append((character["Name"], sanitize_name(character.get("CustomName") or character["Name"]), asset_paths))
+
+    stages = {
+        "process_aiv_files": lambda name, folder, sink, paths: converter.process_aiv_files(name, folder, sink, paths["aiv"]),
+        "process_portrait_files": lambda name, folder, sink, paths: converter.process_portrait_files(name, sink, paths["portraits"]),
+        "process_speech_files": lambda name, folder, sink, paths: converter.process_speech_files(name, folder, sink, paths["speech"]),
+        "process_binks_files": lambda name, folder, sink, paths: converter.process_binks_files(name, folder, sink, paths["binks"]),
+    }
+    results = {}
+    for stage_name, stage in stages.items():
+        def run_stage():
+            for original_name, folder_name, asset_paths in jobs:
+                stage(original_name, folder_name, DirectorySink(os.path.join(scratch_dir, folder_name)), asset_paths)
+
+        def setup():
+            reset_caches()
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+        results[stage_name] = time_call(run_stage, repeat, setup)
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    return results
+
+def reference_sanitize_name(name: str) -> str:
+    """The previous implementation of sanitize_name (chained replacements and a regex per call), kept as the reference."""
+    if not name: return ""
+    name = name.replace('ä', 'ae').replace('Ä', 'Ae')
+    name = name.replace('ö', 'oe').replace('Ö', 'Oe')
+    name = name.replace('ü', 'ue').replace('Ü', 'Ue')
+    name = name.replace('ß', 'ss')
+    return re.sub(r'[^\w\s]', '', name).replace(' ', '')
+
+def reference_speech_map() -> Dict[str, Dict[str, str]]:
+    """Builds the speech table of the first four lords the way it was built before: by adding the shared files at import time."""
+    speech_map = {lord: dict(speech_files) for lord, speech_files in normalization._LORD_SPEECH_FILES.items()}
+    for lord in ["Rat", "Snake", "Pig", "Wolf"]:
+        for key, filename in normalization.SHARED_FILES_FOR_FIRST_FOUR.items():
+            if key not in speech_map[lord]: speech_map[lord][key] = filename
+    return speech_map
+
+def unfreeze(mapping) -> Dict:
+    """Returns a plain, mutable copy of a frozen table."""
+    return {key: unfreeze(value) if isinstance(value, Mapping) else value for key, value in mapping.items()}
+
+def reference_tables_source() -> str:
+    """
+    The tables as they were defined before normalization.py existed: mutable dictionary literals, the derived maps
+    built by comprehensions, and the speech table of the first four lords completed by a loop at import time.
+    """
+    literals = ["GERMAN_TO_ENGLISH_NAMES", "TROOP_INDEX_TO_NAME", "LORD_PREFIX_MAP", "SHARED_FILES_FOR_FIRST_FOUR", "FILENAME_STEM_TO_KEY_MAP", "BINKS_CONFIG", "STANDARD_BINKS_MAPPING"]
+    lines = [f"{name} = {unfreeze(getattr(normalization, name))!r}" for name in literals]
+    lines += ["ENGLISH_TO_GERMAN_NAMES = {v: k for k, v in GERMAN_TO_ENGLISH_NAMES.items()}",
+              "NAME_TO_AI_INDEX = {name: int(index) for index, name in TROOP_INDEX_TO_NAME.items()}",
+              f"SPECIAL_SPEECH_MAP = {unfreeze(normalization._LORD_SPEECH_FILES)!r}",
+              "for lord in ['Rat', 'Snake', 'Pig', 'Wolf']:",
+              "    for key, filename in SHARED_FILES_FOR_FIRST_FOUR.items():",
+              "        if key not in SPECIAL_SPEECH_MAP[lord]: SPECIAL_SPEECH_MAP[lord][key] = filename"]
+    return "\n".join(lines)
+
+def bench_name_normalization(ai_names: List[str], repeat: int) -> Dict:
+    """
+    Times sanitize_name, the frozen lookup tables and the import-time work of building them against their previous
+    implementations, after checking that both give identical results. Raises AssertionError on any difference.
+    """
+    names = ai_names + NORMALIZATION_SAMPLES
+    mismatches = [name for name in names if sanitize_name(name) != reference_sanitize_name(name)]
+    if mismatches: raise AssertionError(f"sanitize_name differs from the reference for {mismatches}")
+    reference_map = reference_speech_map()
+    if [(lord, list(m.items())) for lord, m in reference_map.items()] != [(lord, list(m.items())) for lord, m in normalization.SPECIAL_SPEECH_MAP.items()]:
+        raise AssertionError("SPECIAL_SPEECH_MAP differs from the reference (including key order)")
+    for lord, config in normalization.BINKS_CONFIG.items():
+        if "mapping" not in config: continue
+        if list(dict.fromkeys(config["mapping"].values())) != list(normalization.BINKS_KEYS_BY_FILE[lord]):
+            raise AssertionError(f"BINKS_KEYS_BY_FILE of '{lord}' is not in first-use order")
+
+    # Why: Every name is sanitized several times per run (planning, folder matching, lines), so the workload repeats them.
+    workload = names * 20
+    binks_lords = [lord for lord, config in normalization.BINKS_CONFIG.items() if "mapping" in config]
+    # The special lords' speech and bink files as a case-insensitive folder index would find them, with every
+    # fifth file missing so both the found and the missing branches are compared.
+    special_files = [f for m in reference_map.values() for f in m.values()] + [f for lord in binks_lords for f in normalization.BINKS_CONFIG[lord]["mapping"].values()]
+    available = {filename.lower(): filename for i, filename in enumerate(dict.fromkeys(special_files)) if i % 5}
+
+    def resolve_reference() -> List:
+        """The lookups of the previous plan_speech_files and plan_binks_files: one per mapping key."""
+        resolved = []
+        for lord, speech_map in reference_map.items():
+            resolved.append([(key, available.get(filename.lower())) for key, filename in speech_map.items()])
+            copied_files, final_mappings = {}, {}
+            for key, filename in normalization.BINKS_CONFIG[lord]["mapping"].items():
+                if filename not in copied_files:
+                    actual_filename = available.get(filename.lower())
+                    if actual_filename: copied_files[filename] = actual_filename
+                if filename in copied_files: final_mappings[key] = copied_files[filename]
+            resolved.append((list(copied_files.items()), final_mappings))
+        return resolved
+
+    def resolve_frozen() -> List:
+        """The same lookups through the frozen reverse tables: one per distinct file."""
+        resolved = []
+        for lord, speech_map in normalization.SPECIAL_SPEECH_MAP.items():
+            actual_filenames = {filename: available.get(filename.lower()) for filename in normalization.SPEECH_KEYS_BY_FILE[lord]}
+            resolved.append([(key, actual_filenames[filename]) for key, filename in speech_map.items()])
+            copied_files = {}
+            for filename in normalization.BINKS_KEYS_BY_FILE[lord]:
+                actual_filename = available.get(filename.lower())
+                if actual_filename: copied_files[filename] = actual_filename
+            resolved.append((list(copied_files.items()), {key: copied_files[f] for key, f in normalization.BINKS_CONFIG[lord]["mapping"].items() if f in copied_files}))
+        return resolved
+
+    if resolve_reference() != resolve_frozen(): raise AssertionError("The frozen speech and bink tables resolve different files")
+
+    spec = importlib.util.find_spec("normalization")
+    # Why: Both module bodies are compiled up front, so only the work done at import time is compared.
+    with open(spec.origin, 'r', encoding='utf-8') as f:
+        normalization_code = compile(f.read(), spec.origin, 'exec')
+    reference_code = compile(reference_tables_source(), "<reference tables>", 'exec')
+    reference_namespace = {}
+    exec(reference_code, reference_namespace)
+    if reference_namespace["SPECIAL_SPEECH_MAP"] != unfreeze(normalization.SPECIAL_SPEECH_MAP): raise AssertionError("The reference tables differ from the frozen tables")
+    return {"names": len(names),
+            "identical": True,
+            "sanitize_reference": time_call(lambda: [reference_sanitize_name(name) for name in workload], repeat),
+            "sanitize_name_cold": time_call(lambda: [sanitize_name(name) for name in workload], repeat, sanitize_name.cache_clear),
+            "sanitize_name_warm": time_call(lambda: [sanitize_name(name) for name in workload], repeat),
+            "speech_map_build_reference": time_call(reference_speech_map, repeat),
+            "table_lookups_reference": time_call(resolve_reference, repeat),
+            "table_lookups_frozen": time_call(resolve_frozen, repeat),
+            "tables_module_reference": time_call(lambda: exec(reference_code, {}), repeat),
+            "tables_module_frozen": time_call(lambda: exec(normalization_code, {"__name__": "normalization"}), repeat),
+            "import_normalization": time_call(lambda: spec.loader.exec_module(importlib.util.module_from_spec(spec)), repeat)}
+
+def bench_lines_generation(scratch_dir: str, output_folders: List[str], repeat: int) -> Dict:
+    """Times generate_lines_files over every cr.json of the corpus."""
+    cr_files = ["cr.json"] if os.path.exists("cr.json") else [os.path.join(converter.CR_INPUT_DIR, d, "cr.json") for d in list_subdirs(converter.CR_INPUT_DIR)]
+
+    def run_lines():
+        matcher = FolderMatcher(output_folders)
+        for cr_file in cr_files:
+            lines_generator.generate_lines_files(cr_file, output_folders, scratch_dir, matcher)
+
+    def setup():
+        reset_caches()
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    result = time_call(run_lines, repeat, setup)
+    shutil.rmtree(scratch_dir, ignore_errors=True)
+    return result
+
+def run_benchmarks(corpus_root: str, repeat: int, converter_args: List[str]) -> Dict:
+    """Times main() end to end (cold and incremental) and each individual stage."""
+    results = {}
+    with working_directory(corpus_root):
+        def clean_output():
+            reset_caches()
+            shutil.rmtree(os.path.dirname(converter.OUTPUT_AI_DIR), ignore_errors=True)
+        results["main_cold"] = time_call(lambda: converter.main(converter.parse_cli_args(converter_args + ["--force"])), repeat, clean_output)
+        results["main_incremental"] = time_call(lambda: converter.main(converter.parse_cli_args(converter_args)), repeat, reset_caches)
+
+        output_folders = sorted(os.listdir(converter.OUTPUT_AI_DIR))
+        aic_bases = [os.path.splitext(f)[0] for f in os.listdir(converter.AIC_INPUT_DIR) if f.endswith('.json')]
+        ai_names = [character.get("CustomName") or character["Name"] for f in os.listdir(converter.AIC_INPUT_DIR) if f.endswith('.json') for character in converter.load_aic_characters(f)]
+
+        results["load_all_troop_data"] = time_call(lambda: converter.load_all_troop_data(converter.TROOPS_INPUT_DIR), repeat)
+        results["folder_matching"] = bench_folder_matching(aic_bases, output_folders, ai_names, repeat)
+        results["name_normalization"] = bench_name_normalization(ai_names, repeat)
+        scratch_dir = os.path.join(tempfile.gettempdir(), f"ucp3_bench_scratch_{os.getpid()}")
+        results["process_functions"] = bench_process_functions(scratch_dir, repeat)
+        results["generate_lines_files"] = bench_lines_generation(scratch_dir, output_folders, repeat)
+    return results
+
+def git_revision() -> Union[str, None]:
+    """Returns the current commit of the converter checkout, so results can be compared across commits."""
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# --- MAIN ENTRY POINT ---
+
+def parse_cli_args() -> argparse.Namespace:
+    """Sets up and parses command-line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmarks the AI character converter on a synthetic corpus.")
+    parser.add_argument('--aic-files', type=int, default=10, help="Number of AIC files (each with 16 characters) to generate.")
+    parser.add_argument('--wav-bytes', type=int, default=16 * 1024, help="Size of each generated speech file.")
+    parser.add_argument('--bik-bytes', type=int, default=256 * 1024, help="Size of each generated bink video.")
+    parser.add_argument('--png-bytes', type=int, default=8 * 1024, help="Size of each generated portrait.")
+    parser.add_argument('--aiv-bytes', type=int, default=4 * 1024, help="Size of each generated AIV castle.")
+    parser.add_argument('--repeat', type=int, default=3, help="How often each measurement is repeated.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the generated file contents.")
+    parser.add_argument('--corpus-dir', type=str, default=None, help="Where to generate the corpus (default: a temporary folder).")
+    parser.add_argument('--keep-corpus', action='store_true', help="Do not delete the generated corpus afterwards.")
+    parser.add_argument('--output', type=str, default="benchmark_results.json", help="Where to write the JSON results.")
+    parser.add_argument('--converter-args', type=str, default="", help="Extra arguments passed to the converter for the main() runs, e.g. '--jobs 4'.")
+    return parser.parse_args()
+
+def main(args: argparse.Namespace):
+    corpus_root = os.path.abspath(args.corpus_dir or tempfile.mkdtemp(prefix="ucp3_bench_"))
+    output_path = os.path.abspath(args.output)
+    try:
+        print(f"Generating synthetic corpus with {args.aic_files} AIC file(s) in '{corpus_root}'...")
+        start = time.perf_counter()
+        corpus_info = generate_corpus(corpus_root, args.aic_files, args.wav_bytes, args.bik_bytes, args.png_bytes, args.aiv_bytes, args.seed)
+        corpus_info["generation_seconds"] = round(time.perf_counter() - start, 3)
+        print(f"Generated {corpus_info['input_files']} files ({corpus_info['input_bytes'] / 1024 / 1024:.1f} MiB). Running benchmarks...")
+
+        report = {
+            "revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "corpus": corpus_info,
+            "settings": {"repeat": args.repeat, "converter_args": args.converter_args},
+            "results": run_benchmarks(corpus_root, args.repeat, args.converter_args.split()),
+        }
+    finally:
+        if not args.keep_corpus: shutil.rmtree(corpus_root, ignore_errors=True)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    results = report["results"]
+    print(f"  main() cold:        {results['main_cold']['median']:.3f}s")
+    print(f"  main() incremental: {results['main_incremental']['median']:.3f}s")
+    print(f"Results written to '{output_path}'.")
+
+if __name__ == "__main__":
+    main(parse_cli_args())
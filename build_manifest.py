@@ -0,0 +1,143 @@
+# build_manifest.py
+
+import os
+import json
+import hashlib
+from typing import Union, Dict, List
+
+import profiler
+
+# --- CONSTANTS ---
+# Why: Bumping this version invalidates every stored entry, e.g. when the output format of the converter changes.
+MANIFEST_VERSION = 3
+MANIFEST_FILENAME = "ai_build_manifest.json"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+# --- FUNCTIONS ---
+
+def hash_file(path: str) -> str:
+    """Returns the SHA-1 hex digest of a file, read in chunks to keep memory usage flat."""
+    profiler.count("hash")
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_signature(path: str, with_hash: bool = False) -> Union[Dict, None]:
+    """Returns the size, mtime and (optionally) the content hash of a file, or None if it is missing."""
+    profiler.count("stat")
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    signature = {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+    if with_hash and os.path.isfile(path):
+        signature["sha1"] = hash_file(path)
+    return signature
+
+def fingerprint(*parts) -> str:
+    """Builds a stable hash over arbitrary JSON-serializable inputs."""
+    payload = json.dumps([MANIFEST_VERSION, parts], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the inputs that produced each character folder and each lines generation run.
+    Why: Lets a rerun skip every character whose AIC entry, troop data, asset folders, source files
+         and CLI arguments are unchanged, instead of re-copying the entire asset tree.
+    """
+
+    def __init__(self, manifest_path: str, hash_inputs: bool = False, force: bool = False):
+        self.manifest_path = manifest_path
+        self.hash_inputs = hash_inputs
+        self.previous = {"characters": {}, "lines": {}}
+        self.current = {"version": MANIFEST_VERSION, "characters": {}, "lines": {}}
+        if os.path.exists(manifest_path):
+            if not force:
+                try:
+                    with open(manifest_path, 'r', encoding='utf-8') as f:
+                        stored = json.load(f)
+                    if stored.get("version") == MANIFEST_VERSION:
+                        self.previous = stored
+                except (OSError, ValueError) as e:
+                    print(f"Warning: Could not read build manifest '{manifest_path}', rebuilding everything. Details: {e}")
+            # Why: The manifest is only written back after a complete run, so an interrupted run (forced or not)
+            #      can never leave half-written outputs behind that a later run would consider up to date.
+            os.remove(manifest_path)
+
+    def _sources_unchanged(self, recorded: Dict[str, Dict]) -> bool:
+        for path, old_signature in recorded.items():
+            new_signature = file_signature(path)
+            if new_signature is None or old_signature is None:
+                if new_signature != old_signature: return False
+                continue
+            if new_signature["size"] != old_signature["size"]: return False
+            if new_signature["mtime"] != old_signature["mtime"]:
+                # Why: A touched but otherwise identical file only forces a rebuild when no hash is available.
+                if "sha1" not in old_signature or hash_file(path) != old_signature["sha1"]: return False
+        return True
+
+    def lookup_character(self, folder_name: str, key: str, asset_dirs: List[str], output_layout) -> Union[Dict, None]:
+        """Returns the stored character info if the folder is still up to date, otherwise None."""
+        entry = self.previous["characters"].get(folder_name)
+        if not entry or entry["key"] != key: return None
+        # Why: A deleted or truncated output file (not only a missing character.json) means the folder must be rebuilt.
+        if output_layout.file_signatures(folder_name, list(entry["outputs"])) != entry["outputs"]: return None
+        current_dirs = {d: file_signature(d) for d in asset_dirs}
+        if current_dirs != entry["asset_dirs"]: return None
+        if not self._sources_unchanged(entry["sources"]): return None
+        self.current["characters"][folder_name] = entry
+        # Why: Nothing is copied for a reused character, so its log of copied files starts out empty.
+        return dict(entry["char_info"], status=dict(entry["char_info"]["status"], lines=False), copied_files=[])
+
+    def record_character(self, folder_name: str, key: str, asset_dirs: List[str], sources: List[str], char_info: Dict, outputs: Dict[str, Dict]):
+        """
+        Stores the inputs of a freshly converted character (including sources that asset probing left out),
+        the signatures of the output files it wrote and the method each asset file was placed with.
+        """
+        self.current["characters"][folder_name] = {
+            "key": key,
+            "asset_dirs": {d: file_signature(d) for d in asset_dirs},
+            "sources": {path: file_signature(path, self.hash_inputs) for path in sources},
+            "outputs": dict(outputs),
+            # Why: The copy log repeats every source and target, so only the placement method of each file is kept.
+            "placed": {relpath: mode for _, relpath, mode in char_info["copied_files"]},
+            "char_info": {**{k: v for k, v in char_info.items() if k != "copied_files"}, "status": dict(char_info["status"])},
+        }
+
+    def forget_character(self, folder_name: str):
+        """Drops a character that no longer exists from the manifest of the current run."""
+        self.current["characters"].pop(folder_name, None)
+
+    def lookup_lines(self, cr_json_path: str, language_files: Dict[str, str], existing_folders: List[str], output_layout,
+                     claim: bool = True) -> Union[Dict[str, Dict[str, str]], None]:
+        """
+        Returns the folders that received lines from unchanged cr.json files (with the lines file of each language),
+        otherwise None. The entry is stored under the path of the default language's cr.json.
+        With claim=False the entry is only inspected and not yet carried over into the manifest of this run.
+        """
+        entry = self.previous["lines"].get(cr_json_path)
+        if not entry or entry["key"] != fingerprint(sorted(existing_folders), language_files): return None
+        if not self._sources_unchanged(entry["sources"]): return None
+        if not all(output_layout.has_file(folder, filename) for folder, files in entry["succeeded"].items() for filename in files.values()): return None
+        if claim: self.current["lines"][cr_json_path] = entry
+        return dict(entry["succeeded"])
+
+    def record_lines(self, cr_json_path: str, language_files: Dict[str, str], existing_folders: List[str], succeeded: Dict[str, Dict[str, str]]):
+        """Stores the result of a lines generation run over the cr.json files of all languages."""
+        self.current["lines"][cr_json_path] = {
+            "key": fingerprint(sorted(existing_folders), language_files),
+            "sources": {path: file_signature(path, self.hash_inputs) for path in language_files.values()},
+            "succeeded": dict(succeeded),
+        }
+
+    def save(self):
+        """Atomically writes the manifest of the current run."""
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.current, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.manifest_path)
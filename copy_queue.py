@@ -0,0 +1,124 @@
+# copy_queue.py
+
+import os
+import sys
+import time
+import queue
+import threading
+from typing import Callable, Union, Dict, List, Tuple
+
+import profiler
+
+# --- CONSTANTS ---
+PROGRESS_INTERVAL = 0.5
+
+
+class CopyQueue:
+    """
+    Copies asset files on a fixed number of background threads while characters are still being processed.
+    Why: Lets matching and JSON generation overlap with disk I/O. Pending copies are started largest-first,
+         so big bink videos do not end up as a long tail after everything else has finished.
+    Copy errors do not stop the run; they are collected and returned by finish() for one group or by drain() for the rest.
+    """
+
+    def __init__(self, workers: int, place: Callable, show_progress: bool = True):
+        self.place = place
+        self.show_progress = show_progress and sys.stderr.isatty()
+        self._jobs = queue.PriorityQueue()
+        self._lock = threading.Lock()
+        self._group_done = threading.Condition(self._lock)
+        self._pending: Dict[str, int] = {}
+        self._sequence = 0
+        self._errors: List[Tuple[str, str, str, str, Exception]] = []
+        self._deferred: Dict[str, List[Callable]] = {}
+        self.files_queued = self.files_done = 0
+        self.bytes_queued = self.bytes_done = 0
+        self.started = time.perf_counter()
+        self._done = threading.Event()
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, workers))]
+        for worker in self._workers: worker.start()
+        self._progress = threading.Thread(target=self._report, daemon=True) if self.show_progress else None
+        if self._progress: self._progress.start()
+
+    def submit(self, source_file: str, sink, relpath: str, copy_log: List[list] = None, group: str = "", label: str = ""):
+        """Queues one copy. 'group' (the character) and 'label' (the asset stage) identify it in the error list."""
+        try:
+            size = os.path.getsize(source_file)
+        except OSError:
+            size = 0  # The copy itself will fail and report the error.
+        with self._lock:
+            self._sequence += 1
+            self.files_queued += 1
+            self.bytes_queued += size
+            self._pending[group] = self._pending.get(group, 0) + 1
+            # The priority queue pops the smallest item first, so negative sizes give largest-first order.
+            # Why: The copy counts towards the profiler phase and stage that queued it, not whatever runs when it is done.
+            self._jobs.put((-size, self._sequence, (profiler.bind(self.place), source_file, sink, relpath, copy_log, group, label)))
+
+    def defer(self, group: str, action: Callable):
+        """Runs an action after all copies have finished, but only if no copy of that group failed."""
+        with self._lock:
+            self._deferred.setdefault(group, []).append(action)
+
+    def _work(self):
+        while True:
+            negative_size, _, job = self._jobs.get()
+            if job is None: return
+            place, source_file, sink, relpath, copy_log, group, label = job
+            try:
+                place(source_file, sink, relpath, copy_log)
+            except Exception as e:  # Why: One unreadable or unwritable file must not abort all other copies.
+                with self._lock:
+                    self._errors.append((group, label, source_file, sink.describe(relpath), e))
+            with self._lock:
+                self.files_done += 1
+                self.bytes_done += -negative_size
+                self._pending[group] -= 1
+                if not self._pending[group]: self._group_done.notify_all()
+
+    def _status_line(self) -> str:
+        mib, elapsed = 1024 * 1024, max(time.perf_counter() - self.started, 1e-9)
+        return (f"Copied {self.files_done}/{self.files_queued} files, {self.bytes_done / mib:.1f}/{self.bytes_queued / mib:.1f} MiB "
+                f"({self.bytes_done / mib / elapsed:.1f} MiB/s)")
+
+    def _report(self):
+        while not self._done.wait(PROGRESS_INTERVAL):
+            sys.stderr.write("\r" + self._status_line())
+            sys.stderr.flush()
+
+    def finish(self, group: str, wait: bool = False) -> Union[List[Tuple[str, str, str, str, Exception]], None]:
+        """
+        Completes one group once all of its copies are done: runs its deferred actions if none failed and returns its errors.
+        Returns None if copies of the group are still pending and 'wait' is False.
+        """
+        with self._group_done:
+            while self._pending.get(group):
+                if not wait: return None
+                self._group_done.wait()
+            self._pending.pop(group, None)
+            errors = [error for error in self._errors if error[0] == group]
+            self._errors = [error for error in self._errors if error[0] != group]
+            actions = self._deferred.pop(group, [])
+        if not errors:
+            for action in actions: action()
+        return errors
+
+    def drain(self) -> List[Tuple[str, str, str, str, Exception]]:
+        """
+        Waits for all queued copies, runs the deferred actions of every group without errors,
+        and returns the collected errors as (group, label, source, target, error) tuples.
+        Groups that were already completed with finish() are not reported again.
+        """
+        # Stop markers sort after every real job, so the workers finish the whole queue first.
+        for index, _ in enumerate(self._workers): self._jobs.put((float("inf"), index, None))
+        for worker in self._workers: worker.join()
+        self._done.set()
+        if self._progress:
+            self._progress.join()
+            sys.stderr.write("\r" + " " * len(self._status_line()) + "\r")
+        print(f"\n{self._status_line()} using {len(self._workers)} copy worker(s).")
+        failed_groups = {group for group, _, _, _, _ in self._errors}
+        for group, actions in self._deferred.items():
+            if group in failed_groups: continue
+            for action in actions: action()
+        return list(self._errors)
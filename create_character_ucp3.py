@@ -2,14 +2,30 @@
 
 import os
 import json
-import re
 import sys
-import shutil
+import time
 import argparse
-from typing import Union, Dict, List
+import functools
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Callable, Dict, List, Tuple, Iterable, Iterator, TextIO
 # Import our own modules for cleaner code organization.
+import asset_index
 import lines_generator
-from shared_utils import sanitize_name, find_best_folder_match
+import profiler
+import asset_probe
+from asset_linker import LINK_MODES
+from asset_pool import AssetPool, ASSET_POOL_DIRNAME
+from output_sink import OUTPUT_FORMATS, OutputLayout, DirectorySink, ZipSink, write_text
+from build_manifest import BuildManifest, MANIFEST_FILENAME, fingerprint
+from watcher import TreeWatcher, is_within
+import sharding
+from copy_queue import CopyQueue
+import output_verifier
+import troop_cache
+from shared_utils import sanitize_name, FolderMatcher
+from normalization import (TROOP_INDEX_TO_NAME, NAME_TO_AI_INDEX, LORD_PREFIX_MAP, SPECIAL_SPEECH_MAP, SPEECH_KEYS_BY_FILE, FILENAME_STEM_TO_KEY_MAP,
+                           BINKS_CONFIG, BINKS_KEYS_BY_FILE, BINKS_MOOD_MAP, STANDARD_BINKS_MAPPING)
 
 # --- CONFIGURATION CONSTANTS ---
 # Centralizing all paths makes the script easy to configure and read.
@@ -21,53 +37,49 @@ PORTRAITS_INPUT_DIR = os.path.join("UCP", "resources", "portraits")
 SPEECH_INPUT_DIR = os.path.join("UCP", "resources", "speech")
 BINKS_INPUT_DIR = os.path.join("UCP", "resources", "binks")
 OUTPUT_AI_DIR = os.path.join("resources", "ai")
+# The asset folders that contain one subfolder per AIC pack.
+ASSET_INPUT_DIRS = {"aiv": AIV_INPUT_DIR, "portraits": PORTRAITS_INPUT_DIR, "speech": SPEECH_INPUT_DIR, "binks": BINKS_INPUT_DIR}
+# Everything '--watch' polls: the UCP resources, and the cr.json and asset folders of a single AIC configuration.
+WATCHED_PATHS = [os.path.join("UCP", "resources"), "cr.json", "binks", os.path.join("fx", "speech"), os.path.join("interface_icons2", "Images")]
 
-# This provides a reliable mapping from the fixed troop index to the vanilla AI name.
-TROOP_INDEX_TO_NAME = {
-    "1": "Rat", "2": "Snake", "3": "Pig", "4": "Wolf", "5": "Saladin", "6": "Caliph", 
-    "7": "Sultan", "8": "Richard", "9": "Frederick", "10": "Phillip", "11": "Wazir", 
-    "12": "Emir", "13": "Nizar", "14": "Sheriff", "15": "Marshal", "16": "Abbot",
-}
-# This reverse map is needed to calculate asset numbers based on the vanilla AI name.
-NAME_TO_AI_INDEX = {name: int(index) for index, name in TROOP_INDEX_TO_NAME.items()}
 
+class ProjectPaths:
+    """
+    The input and output paths of one project, resolved against its root folder.
+    Why: The 'batch' command converts several projects in one process, so no path may depend on the working directory.
+         With the default root '.', every path is exactly the relative path of the constants above.
+    """
 
-# --- SPEECH CONFIGURATION ---
-LORD_PREFIX_MAP = {
-    "Saladin": "sa", "Caliph": "ca", "Sultan": "su", "Richard": "ri", "Frederick": "fr", 
-    "Phillip": "ph", "Wazir": "wa", "Emir": "em", "Nizar": "ni", "Sheriff": "sh", 
-    "Marshal": "ma", "Abbot": "ab"
-}
-SPECIAL_SPEECH_MAP = {
-    "Rat": {"taunt_1": "rt_taunt_01.wav", "taunt_2": "rt_taunt_02.wav", "taunt_3": "rt_taunt_05.wav", "taunt_4": "rt_taunt_08.wav", "anger_1": "rt_anger_04.wav", "anger_2": "rt_anger_01.wav", "plead": "rt_plead_01.wav", "nervous_1": "rt_plead_04.wav", "nervous_2": "rt_plead_03.wav", "victory_1": "rt_vict_01.wav", "victory_2": "rt_vict_02.wav", "victory_3": "rt_vict_04.wav", "victory_4": "rt_vict_03.wav", "ally_death": "rt_anger_02.wav", "kick_player": "rt_kick_player.wav", "add_player": "rt_add_player.wav"},
-    "Snake": {"taunt_1": "sn_taunt_01.wav", "taunt_2": "sn_taunt_04.wav", "taunt_3": "sn_taunt_05.wav", "taunt_4": "sn_taunt_07.wav", "anger_1": "sn_anger_03.wav", "anger_2": "sn_anger_04.wav", "plead": "sn_plead_01.wav", "nervous_1": "sn_plead_04.wav", "nervous_2": "sn_plead_03.wav", "victory_1": "sn_vict_02.wav", "victory_2": "sn_taunt_03.wav", "victory_3": "sn_vict_03.wav", "victory_4": "sn_vict_04.wav", "ally_death": "all_ally_death_01.wav", "kick_player": "sn_kick_player.wav", "add_player": "sn_add_player.wav"},
-    "Pig": {"taunt_1": "pg_taunt_03.wav", "taunt_2": "pg_taunt_04.wav", "taunt_3": "pg_taunt_06.wav", "taunt_4": "pg_taunt_07.wav", "anger_1": "pg_anger_04.wav", "anger_2": "pg_anger_02.wav", "plead": "pg_plead_01.wav", "nervous_1": "pg_plead_03.wav", "nervous_2": "pg_plead_04.wav", "victory_1": "pg_vict_01.wav", "victory_2": "pg_vict_02.wav", "victory_3": "pg_vict_03.wav", "victory_4": "pg_taunt_02.wav", "ally_death": "pg_plead_02.wav", "kick_player": "pg_kick_player.wav", "add_player": "pg_add_player.wav"},
-    "Wolf": {"taunt_1": "wf_taunt_01.wav", "taunt_2": "wf_taunt_02.wav", "taunt_3": "wf_taunt_05.wav", "taunt_4": "wf_taunt_06.wav", "anger_1": "wf_anger_04.wav", "anger_2": "wf_anger_02.wav", "plead": "wf_plead_01.wav", "nervous_1": "wf_plead_03.wav", "nervous_2": "wf_plead_04.wav", "victory_1": "wf_vict_02.wav", "victory_2": "wf_taunt_04.wav", "victory_3": "wf_vict_01.wav", "victory_4": "all_vict_04.wav", "ally_death": "all_ally_death_01.wav", "kick_player": "wf_kick_player.wav", "add_player": "wf_add_player.wav"}
-}
-SHARED_FILES_FOR_FIRST_FOUR = { "request": "all_req_01.wav", "thanks": "all_thanks_01.wav", "congrats": "all_congrats_01.wav", "boast": "all_boast_01.wav", "help": "all_help_01.wav", "extra": "all_extra_01.wav", "siege": "all_siege_01.wav", "no_attack_1": "all_noattack_01.wav", "no_attack_2": "all_noattack_02.wav", "no_help_1": "all_nohelp_01.wav", "no_help_2": "all_nohelp_02.wav", "no_sent": "all_notsent_01.wav", "sent": "all_sent_01.wav", "team_winning": "all_team_winning_01.wav", "team_losing": "all_team_losing_01.wav", "help_sent": "all_helpsent_01.wav", "will_attack": "all_willattack_01.wav" }
-for lord in ["Rat", "Snake", "Pig", "Wolf"]:
-    for key, filename in SHARED_FILES_FOR_FIRST_FOUR.items():
-        if key not in SPECIAL_SPEECH_MAP[lord]: SPECIAL_SPEECH_MAP[lord][key] = filename
-FILENAME_STEM_TO_KEY_MAP = { "taunt_01": "taunt_1", "taunt_02": "taunt_2", "taunt_03": "taunt_3", "taunt_04": "taunt_4", "anger_01": "anger_1", "anger_02": "anger_2", "plead_01": "plead", "nervous_01": "nervous_1", "nervous_02": "nervous_2", "vict_01": "victory_1", "vict_02": "victory_2", "vict_03": "victory_3", "vict_04": "victory_4", "req_01": "request", "thanks_01": "thanks", "ally_death_01": "ally_death", "congrats_01": "congrats", "boast_01": "boast", "help_01": "help", "extra_01": "extra", "kick_player_01": "kick_player", "add_player_01": "add_player", "siege_01": "siege", "noattack_01": "no_attack_1", "noattack_02": "no_attack_2", "nohelp_01": "no_help_1", "nohelp_02": "no_help_2", "notsent_01": "no_sent", "sent_01": "sent", "team_winning_01": "team_winning", "team_losing_01": "team_losing", "helpsent_01": "help_sent", "willattack_01": "will_attack" }
-
-# --- BINKS CONFIGURATION ---
-BINKS_CONFIG = {
-    "Saladin": {"prefix": "saladin_"}, "Caliph": {"prefix": "bad_arab_"}, "Sultan": {"prefix": "sultan_"},
-    "Richard": {"prefix": "richard_"}, "Frederick": {"prefix": "fred_"}, "Phillip": {"prefix": "philip_"},
-    "Wazir": {"prefix": "vizir_"}, "Emir": {"prefix": "emir_"}, "Nizar": {"prefix": "nazir_"},
-    "Sheriff": {"prefix": "sheriff_"}, "Marshal": {"prefix": "ma_"}, "Abbot": {"prefix": "abbot_"},
-    "Rat": {"mapping": { "taunt_1": "rt_taunt2.bik", "taunt_2": "rt_taunt1.bik", "taunt_3": "rt_taunt2.bik", "taunt_4": "rt_taunt1.bik", "anger_1": "rt_anger1.bik", "anger_2": "rt_anger1.bik", "plead": "rt_plead1.bik", "nervous_1": "rt_plead2.bik", "nervous_2": "rt_plead3.bik", "victory_1": "rt_vict1.bik", "victory_2": "rt_vict1.bik", "victory_3": "rt_vict1.bik", "victory_4": "rt_vict1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "rt_anger1.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
-    "Snake": {"mapping": { "taunt_1": "sn_taunt1.bik", "taunt_2": "sn_taunt2.bik", "taunt_3": "sn_taunt1.bik", "taunt_4": "sn_taunt2.bik", "anger_1": "sn_anger1.bik", "anger_2": "sn_anger1.bik", "plead": "sn_plead2.bik", "nervous_1": "sn_plead2.bik", "nervous_2": "sn_plead2.bik", "victory_1": "sn_vict2.bik", "victory_2": "sn_vict1.bik", "victory_3": "sn_vict1.bik", "victory_4": "sn_taunt1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "bad_soldier_nevous.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
-    "Pig": {"mapping": { "taunt_1": "pg_taunt1.bik", "taunt_2": "pg_taunt2.bik", "taunt_3": "pg_taunt1.bik", "taunt_4": "pg_taunt2.bik", "anger_1": "pg_anger1.bik", "anger_2": "pg_anger1.bik", "plead": "pg_plead1.bik", "nervous_1": "pg_plead2.bik", "nervous_2": "pg_plead1.bik", "victory_1": "pg_vict1.bik", "victory_2": "pg_vict2.bik", "victory_3": "pg_vict3.bik", "victory_4": "pg_vict1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "pg_plead1.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
-    "Wolf": {"mapping": { "taunt_1": "wf_taunt1.bik", "taunt_2": "wf_taunt2.bik", "taunt_3": "wf_taunt1.bik", "taunt_4": "wf_taunt2.bik", "anger_1": "wf_anger1.bik", "anger_2": "wf_anger1.bik", "plead": "wf_plead1.bik", "nervous_1": "wf_plead2.bik", "nervous_2": "wf_plead1.bik", "victory_1": "wf_vict1.bik", "victory_2": "wf_vict2.bik", "victory_3": "wf_vict1.bik", "victory_4": "bad_soldier_taunt.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "bad_soldier_nevous.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}}
+    def __init__(self, root: str = "."):
+        self.root = root
+        self.aiv, self.aic, self.troops, self.cr = (self.resolve(p) for p in (AIV_INPUT_DIR, AIC_INPUT_DIR, TROOPS_INPUT_DIR, CR_INPUT_DIR))
+        self.asset_dirs = {key: self.resolve(path) for key, path in ASSET_INPUT_DIRS.items()}
+        # The root folders used when the project has a single AIC configuration.
+        self.single_cr_json, self.single_binks, self.single_fx = self.resolve("cr.json"), self.resolve("binks"), self.resolve("fx")
+        self.single_portraits = self.resolve(os.path.join("interface_icons2", "Images"))
+        self.watched = [self.resolve(p) for p in WATCHED_PATHS]
+        self.output_ai = self.resolve(OUTPUT_AI_DIR)
+        self.output_base = os.path.dirname(self.output_ai)
+        self.troop_cache = os.path.join(self.output_base, troop_cache.TROOP_CACHE_FILENAME)
+
+    def resolve(self, path: str) -> str:
+        return os.path.normpath(os.path.join(self.root, path))
+
+DEFAULT_PATHS = ProjectPaths()
+
+# Printed once an asset stage has placed its files.
+STAGE_MESSAGES = {
+    "aiv": "    ├─ Found and processed AIV files, created mapping.json",
+    "portrait": "    ├─ Found and processed portrait files.",
+    "speech": "    ├─ Found and processed speech files, created mapping.json",
+    "binks": "    └─ Found and processed bink files, created mapping.json",
 }
-STANDARD_BINKS_MAPPING = { "taunt_1": "taunting", "taunt_2": "taunting", "taunt_3": "taunting", "taunt_4": "taunting", "anger_1": "nervous", "anger_2": "nervous", "plead": "nervous", "nervous_1": "nervous", "nervous_2": "anger", "victory_1": "natural", "victory_2": "taunting", "victory_3": "natural", "victory_4": "natural", "request": "natural", "thanks": "natural", "ally_death": "nervous", "congrats": "natural", "boast": "taunting", "help": "nervous", "extra": "natural", "siege": "taunting", "no_attack_1": "nervous", "no_attack_2": "nervous", "no_help_1": "nervous", "no_help_2": "nervous", "no_sent": "nervous", "sent": "natural", "team_losing": "nervous", "team_winning": "taunting", "help_sent": "natural", "will_attack": "natural" }
 
 
 # --- HELPER & LOGIC FUNCTIONS ---
 
-def write_aligned_json(data: Dict, output_path: str):
-    """Writes a dictionary to a JSON file with aligned colons for readability."""
+def write_aligned_json(data: Dict, output: Union[str, TextIO]):
+    """Writes a dictionary to a JSON file (path or open stream) with aligned colons for readability."""
     if not data: return
     # Calculate the required padding based on the longest key.
     max_key_len = max(len(k) for k in data.keys())
@@ -85,146 +97,241 @@ def write_aligned_json(data: Dict, output_path: str):
             line += ","
         output_lines.append(line)
     output_lines.append("}")
-    
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(output_lines))
+    write_text(output, "\n".join(output_lines))
 
-def load_all_troop_data(troops_path: str) -> dict:
-    """Loads all troop JSON files into a single dictionary, keyed by vanilla AI name."""
-    all_troops = {}
+def copy_asset(source_file: str, sink: Union[DirectorySink, ZipSink], relpath: str, copy_log: Union[List[list], None] = None):
+    """Places a single asset file in the output and logs its source, its path in the character's output and the method used."""
+    active_profiler = profiler.active()
+    start = time.perf_counter() if active_profiler else 0.0
+    used_mode = sink.place_file(source_file, relpath)
+    if active_profiler:
+        active_profiler.count(used_mode)
+        active_profiler.record_file(source_file, time.perf_counter() - start)
+    if copy_log is not None: copy_log.append([source_file, relpath, used_mode])
+
+def normalize_troop_entry(troop_info: dict) -> dict:
+    """Converts the raw troop entry of a lord into the 'lord' and 'startTroops' structures of character.json."""
+    return {
+        "lord": troop_info.get("Lord", {}),
+        "startTroops": {mode: dict(zip(troop_info.get(mode, {}).get('Units', []), troop_info.get(mode, {}).get('Counts', []))) for mode in ("normal", "crusader", "deathmatch")},
+    }
+
+def load_all_troop_data(troops_path: str, cache_path: Union[str, None] = None, refresh: bool = False, shared: Union[Dict, None] = None,
+                        save: bool = True) -> dict:
+    """
+    Loads all troop JSON files into a single dictionary of normalized troop data, keyed by vanilla AI name.
+    With a cache_path, the result is stored in a binary cache that is reused until any troop file changes.
+    With save=False (dry runs and 'verify') an existing cache is still read, but never written.
+    With a shared dictionary (batch runs), troop folders with identical files are only parsed once per process.
+    """
     print(f"Loading troop data from '{troops_path}'...")
+    cache_key = troop_cache.source_key(troops_path) if cache_path else None
+    cached_troops = troop_cache.load(cache_path, cache_key) if cache_path and not refresh else None
+    if cached_troops is not None:
+        print(f"Successfully loaded troop data for {len(cached_troops)} lords (from cache).")
+        return cached_troops
+    content_key = troop_cache.content_key(troops_path) if shared is not None else None
+    if content_key in (shared or {}):
+        if cache_path and save: troop_cache.save(cache_path, cache_key, shared[content_key])
+        print(f"Successfully loaded troop data for {len(shared[content_key])} lords (shared with a previous project).")
+        return shared[content_key]
+
+    all_troops = {}
+    profiler.count("listdir")
     for filename in os.listdir(troops_path):
         if not filename.endswith('.json'): continue
+        profiler.count("read")
         with open(os.path.join(troops_path, filename), 'r', encoding='utf-8-sig') as f:
             for index, troop_info in json.load(f).items():
                 if index in TROOP_INDEX_TO_NAME:
-                    all_troops[TROOP_INDEX_TO_NAME[index]] = troop_info
+                    all_troops[TROOP_INDEX_TO_NAME[index]] = normalize_troop_entry(troop_info)
+    if cache_path and save: troop_cache.save(cache_path, cache_key, all_troops)
+    if shared is not None: shared[content_key] = all_troops
     print(f"Successfully loaded troop data for {len(all_troops)} lords.")
     return all_troops
 
-def process_aiv_files(original_name, output_name, char_output_dir, source_path) -> bool:
-    """Finds, copies, renames, and maps AIV files for a single character."""
-    if not source_path or not os.path.isdir(source_path): return False
-    files_to_copy = []
-    for filename in os.listdir(source_path):
-        if re.match(f"^{original_name.lower()}(\\d+)\\.aiv$", filename.lower()):
-            files_to_copy.append(filename)
-    if not files_to_copy: return False
+def make_asset_plan(copies: List[list], mapping_file: Union[str, None] = None, mappings: Union[Dict, None] = None,
+                    mapping_format: str = "aligned", found: bool = True) -> Dict:
+    """Describes the work of one asset stage: the [source, relpath] copies and the mapping file to write."""
+    return {"found": found, "copies": copies, "mapping_file": mapping_file, "mappings": mappings or {}, "mapping_format": mapping_format}
+
+def screen_asset_plan(asset_plan: Union[Dict, None]) -> Union[Dict, None]:
+    """
+    Applies asset probing ('--validate-assets') to one asset stage, which flags or drops corrupt sources.
+    Dropped copies are kept under 'dropped', so the build manifest still notices when such a file is replaced.
+    """
+    if not asset_plan: return asset_plan
+    copies, mappings, dropped = asset_probe.screen(asset_plan["copies"], asset_plan["mapping_file"], asset_plan["mappings"])
+    if not dropped: return asset_plan
+    # A stage whose files were all dropped has found nothing, just like a stage without any files.
+    found = asset_plan["found"] and bool(copies) and (bool(mappings) or not asset_plan["mapping_file"])
+    return dict(asset_plan, found=found, copies=copies, mappings=mappings, dropped=[copy for copy in asset_plan["copies"] if copy not in copies])
+
+def screen_char_plan(char_plan: Dict) -> Dict:
+    """
+    Probes the asset sources of a character that is about to be written, printed or verified.
+    Why: Probing while planning would also read the headers of every character the build manifest then skips.
+    """
+    if not asset_probe.active(): return char_plan
+    return dict(char_plan, assets={stage: screen_asset_plan(asset_plan) for stage, asset_plan in char_plan["assets"].items()})
+
+def screen_plan(plan: Dict) -> Dict:
+    """Probes the asset sources of every character of a complete plan."""
+    return dict(plan, characters={folder_name: screen_char_plan(char_plan) for folder_name, char_plan in plan["characters"].items()})
+
+def plan_aiv_files(original_name: str, output_name: str, source_path: str) -> Union[Dict, None]:
+    """Finds, renames, and maps the AIV files for a single character."""
+    index = asset_index.get_index(source_path)
+    if not index.exists: return None
+    files_to_copy = index.aiv_files(original_name)
+    if not files_to_copy: return None
     
-    output_dir = os.path.join(char_output_dir, "aiv")
-    os.makedirs(output_dir, exist_ok=True)
-    mappings = {}
-    for filename in files_to_copy:
-        number = re.match(f"^{original_name.lower()}(\\d+)\\.aiv$", filename.lower()).group(1)
+    copies, mappings = [], {}
+    for number, filename in files_to_copy:
         new_filename = f"{output_name.lower()}{number}.aiv"
-        shutil.copy2(os.path.join(source_path, filename), os.path.join(output_dir, new_filename))
+        copies.append([index.path(filename), f"aiv/{new_filename}"])
         mappings[f"castle_{number}"] = new_filename
-    with open(os.path.join(output_dir, "mapping.json"), 'w', encoding='utf-8') as f: json.dump(mappings, f, indent=2)
-    print(f"    ├─ Found and processed AIV files, created mapping.json")
-    return True
+    return make_asset_plan(copies, "aiv/mapping.json", mappings, "json")
 
-def process_portrait_files(original_name: str, char_output_dir: str, source_path: str) -> bool:
-    """Finds, copies, and renames the portrait images for a character."""
-    if not source_path or not os.path.isdir(source_path): return False
+def plan_portrait_files(original_name: str, source_path: str) -> Union[Dict, None]:
+    """Finds and renames the portrait images for a character."""
+    index = asset_index.get_index(source_path)
+    if not index.exists: return None
     ai_index = NAME_TO_AI_INDEX.get(original_name)
-    if not ai_index: return False
-    large_src = os.path.join(source_path, f"Image{522 + ai_index}.png")
-    small_src = os.path.join(source_path, f"Image{700 + ai_index}.png")
-    portraits_found = False
-    if os.path.exists(large_src):
-        shutil.copy2(large_src, os.path.join(char_output_dir, "portrait.png")); portraits_found = True
-    if os.path.exists(small_src):
-        shutil.copy2(small_src, os.path.join(char_output_dir, "portrait_small.png")); portraits_found = True
-    if portraits_found: print(f"    ├─ Found and processed portrait files.")
-    return portraits_found
-
-def process_speech_files(original_name, output_name, char_output_dir, source_path) -> bool:
-    """Dynamically finds, copies, and maps speech files based on the AI type."""
-    if not source_path or not os.path.isdir(source_path): return False
+    if not ai_index: return None
+    large_src = index.find(f"Image{522 + ai_index}.png")
+    small_src = index.find(f"Image{700 + ai_index}.png")
+    copies = []
+    if large_src: copies.append([index.path(large_src), "portrait.png"])
+    if small_src: copies.append([index.path(small_src), "portrait_small.png"])
+    return make_asset_plan(copies) if copies else None
+
+def plan_speech_files(original_name: str, output_name: str, source_path: str) -> Union[Dict, None]:
+    """Dynamically finds and maps speech files based on the AI type."""
+    index = asset_index.get_index(source_path)
+    if not index.exists: return None
+    # Each entry holds the mapping key, the name used for the output file, and the actual file on disk.
     final_mappings, files_to_copy = {}, []
     
     # Check if the current AI has a special, hardcoded mapping.
     if original_name in SPECIAL_SPEECH_MAP:
-        speech_map = SPECIAL_SPEECH_MAP[original_name]
-        for key, source_filename in speech_map.items():
-            if os.path.exists(os.path.join(source_path, source_filename)):
-                files_to_copy.append((key, source_filename))
+        actual_filenames = {source_filename: index.find(source_filename) for source_filename in SPEECH_KEYS_BY_FILE[original_name]}
+        for key, source_filename in SPECIAL_SPEECH_MAP[original_name].items():
+            if actual_filenames[source_filename]:
+                files_to_copy.append((key, source_filename, actual_filenames[source_filename]))
     # Otherwise, process it as a standard lord by scanning for files with a known prefix.
     elif original_name in LORD_PREFIX_MAP:
         prefix = LORD_PREFIX_MAP[original_name]
-        for filename in os.listdir(source_path):
-            if filename.lower().startswith(prefix + "_"):
-                stem = filename[len(prefix)+1:].replace('.wav', '')
-                key = FILENAME_STEM_TO_KEY_MAP.get(stem)
-                if key: files_to_copy.append((key, filename))
+        for filename in index.files_with_prefix(prefix + "_"):
+            stem = filename[len(prefix)+1:].replace('.wav', '')
+            key = FILENAME_STEM_TO_KEY_MAP.get(stem)
+            if key: files_to_copy.append((key, filename, filename))
 
     # The General_Message file is handled consistently for all lords.
     ai_index = NAME_TO_AI_INDEX.get(original_name)
     if ai_index:
         gm_filename = f"General_Message{22 + ai_index}.wav"
         if original_name in ["Pig", "Wolf"]: gm_filename = SPECIAL_SPEECH_MAP[original_name].get("message_from", gm_filename)
-        if os.path.exists(os.path.join(source_path, gm_filename)):
-            files_to_copy.append(("message_from", gm_filename))
+        actual_filename = index.find(gm_filename)
+        if actual_filename:
+            files_to_copy.append(("message_from", gm_filename, actual_filename))
             
-    if not files_to_copy: return False
-    output_dir = os.path.join(char_output_dir, "speech")
-    os.makedirs(output_dir, exist_ok=True)
-    for key, source_filename in files_to_copy:
+    if not files_to_copy: return None
+    copies = []
+    for key, source_filename, actual_filename in files_to_copy:
         prefix, _, suffix = source_filename.partition('_')
         new_filename = f"{output_name.lower()}_{suffix}" if suffix else f"{output_name.lower()}_{source_filename}"
         if key == "message_from": new_filename = f"General_Message_{output_name.lower()}.wav"
-        shutil.copy2(os.path.join(source_path, source_filename), os.path.join(output_dir, new_filename))
+        copies.append([index.path(actual_filename), f"speech/{new_filename}"])
         final_mappings[key] = new_filename
-        
-    write_aligned_json(final_mappings, os.path.join(output_dir, "mapping.json"))
-    print(f"    ├─ Found and processed speech files, created mapping.json")
-    return True
+    return make_asset_plan(copies, "speech/mapping.json", final_mappings)
 
-def process_binks_files(original_name: str, output_name: str, char_output_dir: str, source_path: str) -> bool:
-    """Finds, copies, renames, and maps all Bink video files for a character."""
-    if not source_path or not os.path.isdir(source_path): return False
+def plan_binks_files(original_name: str, output_name: str, source_path: str) -> Union[Dict, None]:
+    """Finds, renames, and maps all Bink video files for a character."""
+    index = asset_index.get_index(source_path)
+    if not index.exists: return None
     config = BINKS_CONFIG.get(original_name)
-    if not config: return False
-    final_mappings, files_found = {}, False
+    if not config: return None
+    final_mappings, copies = {}, []
     
     # The logic is split to handle standard lords vs. the unique first four.
     if "prefix" in config:
-        mood_map = {"anger": "anger", "angry": "anger", "taunt": "taunting", "taunting": "taunting", "confident": "taunting", "nervous": "nervous", "natural": "natural"}
-        found_videos = {} 
-        for filename in os.listdir(source_path):
-            if filename.lower().startswith(config["prefix"]):
-                mood_stem = filename.lower().replace(config["prefix"], "").replace(".bik", "")
-                if mood_stem in mood_map:
-                    if not files_found: # Create directory only when the first file is found.
-                        os.makedirs(os.path.join(char_output_dir, "binks"), exist_ok=True); files_found = True
-                    standard_mood = mood_map[mood_stem]
-                    new_filename = f"{output_name.lower()}_{standard_mood}.bik"
-                    found_videos[standard_mood] = new_filename
-                    shutil.copy2(os.path.join(source_path, filename), os.path.join(char_output_dir, "binks", new_filename))
+        found_videos = {}
+        for filename in index.files_with_prefix(config["prefix"]):
+            mood_stem = filename.lower().replace(config["prefix"], "").replace(".bik", "")
+            if mood_stem in BINKS_MOOD_MAP:
+                standard_mood = BINKS_MOOD_MAP[mood_stem]
+                new_filename = f"{output_name.lower()}_{standard_mood}.bik"
+                found_videos[standard_mood] = new_filename
+                copies.append([index.path(filename), f"binks/{new_filename}"])
         for key, mood in STANDARD_BINKS_MAPPING.items():
             if mood in found_videos: final_mappings[key] = found_videos[mood]
     elif "mapping" in config:
-        copied_files = {} 
-        for key, source_filename in config["mapping"].items():
-            source_file = os.path.join(source_path, source_filename)
-            if source_file not in copied_files and os.path.exists(source_file):
-                if not files_found:
-                    os.makedirs(os.path.join(char_output_dir, "binks"), exist_ok=True); files_found = True
+        # Why: Several mapping keys share one video (e.g. 'bad_soldier_taunt.bik'), which is looked up and copied only once.
+        copied_files = {}
+        for source_filename in BINKS_KEYS_BY_FILE[original_name]:
+            actual_filename = index.find(source_filename)
+            if actual_filename:
                 new_filename = f"{output_name.lower()}_{source_filename.replace('.bikk', '.bik')}"
-                shutil.copy2(source_file, os.path.join(char_output_dir, "binks", new_filename))
-                copied_files[source_file] = new_filename
-            if source_file in copied_files:
-                final_mappings[key] = copied_files[source_file]
+                copies.append([index.path(actual_filename), f"binks/{new_filename}"])
+                copied_files[source_filename] = new_filename
+        final_mappings = {key: copied_files[source_filename] for key, source_filename in config["mapping"].items() if source_filename in copied_files}
                 
-    if final_mappings:
-        write_aligned_json(final_mappings, os.path.join(char_output_dir, "binks", "mapping.json"))
-        print(f"    └─ Found and processed bink files, created mapping.json")
-    return bool(final_mappings)
+    if not copies: return None
+    return make_asset_plan(copies, "binks/mapping.json", final_mappings, found=bool(final_mappings))
+
+def execute_asset_plan(stage: str, plan: Union[Dict, None], sink: Union[DirectorySink, ZipSink], copy_log: Union[List[list], None] = None,
+                       place: Callable = copy_asset) -> bool:
+    """
+    Carries out the copies and the mapping file of one asset stage and returns whether the stage found its assets.
+    'place' performs each copy; it can also hand the copy to a CopyQueue instead of copying right away.
+    """
+    if not plan: return False
+    # Why: Each destination is written once; if several operations target it, the last one wins, just as if
+    #      they were copied in order. Sorting by source reads every source folder in one sequential pass.
+    copies = {relpath: source_file for source_file, relpath in plan["copies"]}
+    for relpath, source_file in sorted(copies.items(), key=lambda item: item[1]):
+        place(source_file, sink, relpath, copy_log)
+    if not plan["found"]: return False
+    if plan["mapping_file"]:
+        with sink.open_text(plan["mapping_file"]) as f:
+            if plan["mapping_format"] == "json": json.dump(plan["mappings"], f, indent=2)
+            else: write_aligned_json(plan["mappings"], f)
+    print(STAGE_MESSAGES[stage])
+    return True
+
+def plan_sources(char_plan: dict) -> List[str]:
+    """Lists the asset sources of a character, including the ones asset probing dropped."""
+    return sorted({source for asset_plan in char_plan["assets"].values() if asset_plan
+                   for source, _ in asset_plan["copies"] + asset_plan.get("dropped", [])})
+
+def plan_outputs(char_plan: dict) -> List[str]:
+    """Lists the files write_character_output writes for a character; meta.json and the lines are written later."""
+    outputs = {"character.json"}
+    for asset_plan in char_plan["assets"].values():
+        if not asset_plan: continue
+        outputs.update(relpath for _, relpath in asset_plan["copies"])
+        if asset_plan["found"] and asset_plan["mapping_file"]: outputs.add(asset_plan["mapping_file"])
+    return sorted(outputs)
+
+def process_aiv_files(original_name, output_name, sink, source_path, copy_log: Union[List[list], None] = None) -> bool:
+    """Finds, copies, renames, and maps AIV files for a single character."""
+    return execute_asset_plan("aiv", plan_aiv_files(original_name, output_name, source_path), sink, copy_log)
+
+def process_portrait_files(original_name: str, sink: Union[DirectorySink, ZipSink], source_path: str, copy_log: Union[List[list], None] = None) -> bool:
+    """Finds, copies, and renames the portrait images for a character."""
+    return execute_asset_plan("portrait", plan_portrait_files(original_name, source_path), sink, copy_log)
+
+def process_speech_files(original_name, output_name, sink, source_path, copy_log: Union[List[list], None] = None) -> bool:
+    """Dynamically finds, copies, and maps speech files based on the AI type."""
+    return execute_asset_plan("speech", plan_speech_files(original_name, output_name, source_path), sink, copy_log)
+
+def process_binks_files(original_name: str, output_name: str, sink: Union[DirectorySink, ZipSink], source_path: str, copy_log: Union[List[list], None] = None) -> bool:
+    """Finds, copies, renames, and maps all Bink video files for a character."""
+    return execute_asset_plan("binks", plan_binks_files(original_name, output_name, source_path), sink, copy_log)
 
-def create_meta_json(folder_name: str, char_info: dict, cli_args: argparse.Namespace):
+def create_meta_json(folder_name: str, char_info: dict, cli_args: argparse.Namespace, output_layout: OutputLayout):
     """Creates the final meta.json file based on all processed data."""
-    output_dir = os.path.join(OUTPUT_AI_DIR, folder_name)
-    
     # Determine the 'name' field based on whether it's a vanilla remake or a new character.
     if not char_info['custom_name']:
         aic_filename_base = os.path.splitext(char_info['aic_file'])[0]
@@ -239,123 +346,827 @@ def create_meta_json(folder_name: str, char_info: dict, cli_args: argparse.Names
         "link": "",
         "version": "1.0.0",
         "defaultLang": cli_args.defaultLang,
-        "supportedLang": [cli_args.defaultLang],
+        # Why: Only the languages whose lines were actually generated are supported (see lines_generator.find_language_files).
+        "supportedLang": char_info.get("languages") or [cli_args.defaultLang],
         "switched": char_info["status"]
     }
-    with open(os.path.join(output_dir, "meta.json"), 'w', encoding='utf-8') as f:
-        json.dump(meta_data, f, indent=2)
+    meta_content = json.dumps(meta_data, indent=2)
+    with output_layout.open(folder_name) as sink:
+        # Why: Rewriting an identical meta.json would only bump its mtime and trigger needless downstream syncs.
+        if sink.read_text("meta.json") == meta_content:
+            print(f"    └─ meta.json for '{folder_name}' is already up to date.")
+            return
+        with sink.open_text("meta.json") as f:
+            f.write(meta_content)
     print(f"    └─ Successfully created meta.json for '{folder_name}'")
 
-def process_cr_files(aic_files: list, processed_chars: dict):
-    """Finds and triggers the processing of all relevant cr.json files."""
-    existing_folders = list(processed_chars.keys())
-    if len(aic_files) == 1:
+def update_meta_lines(folder_name: str, languages: List[str], cli_args: argparse.Namespace, output_layout: OutputLayout):
+    """
+    Marks lines as generated in the meta.json of a character that was already finalized.
+    Why: Finalized characters are no longer held in memory, so their meta.json is updated from its own content.
+    """
+    with output_layout.open(folder_name) as sink:
+        meta_content = sink.read_text("meta.json")
+        if meta_content is None: return
+        meta_data = json.loads(meta_content)
+        meta_data["supportedLang"] = languages or [cli_args.defaultLang]
+        meta_data["switched"]["lines"] = True
+        if json.dumps(meta_data, indent=2) == meta_content: return
+        with sink.open_text("meta.json") as f:
+            f.write(json.dumps(meta_data, indent=2))
+    print(f"    └─ Successfully created meta.json for '{folder_name}'")
+
+def run_lines_generator(cr_json_path: str, processed_chars: dict, folder_matcher: FolderMatcher, output_layout: OutputLayout, default_lang: str,
+                        manifest: Union[BuildManifest, None] = None, reuse: bool = True) -> Dict[str, Dict[str, str]]:
+    """
+    Generates the lines files of every language for one cr.json (and its 'cr_<lang>.json' translations), unless the
+    build manifest shows they are up to date, and returns the folders that received lines with the file of each language.
+    With reuse=False the lines are always regenerated, but still recorded in the manifest.
+    """
+    existing_folders = folder_matcher.folders
+    language_files = lines_generator.find_language_files(cr_json_path, default_lang)
+    succeeded = manifest.lookup_lines(cr_json_path, language_files, existing_folders, output_layout) if manifest and reuse else None
+    if succeeded is not None:
+        print(f"\n--- Skipping Lines Generator for: {os.path.basename(cr_json_path)} (unchanged since the last build) ---")
+    else:
+        succeeded = lines_generator.generate_language_lines_files(language_files, existing_folders, output_layout.base_dir, folder_matcher, output_layout)
+        if manifest: manifest.record_lines(cr_json_path, language_files, existing_folders, succeeded)
+    for folder, written_files in succeeded.items():
+        if folder in processed_chars:
+            processed_chars[folder]["status"]["lines"] = True
+            processed_chars[folder]["languages"] = list(written_files)
+    return succeeded
+
+def plan_cr_files(aic_files: list, is_single_config: Union[bool, None] = None, paths: ProjectPaths = DEFAULT_PATHS) -> Dict[str, Union[str, None]]:
+    """Finds the cr.json that belongs to each AIC file (None if there is none)."""
+    if is_single_config is None: is_single_config = len(aic_files) == 1
+    if is_single_config:
         print("\nSingle AIC configuration found. Looking for 'cr.json' in root folder.")
-        if os.path.exists('cr.json'):
-            succeeded = lines_generator.generate_lines_files('cr.json', existing_folders, OUTPUT_AI_DIR)
-            for folder in succeeded:
-                if folder in processed_chars: processed_chars[folder]["status"]["lines"] = True
-        else: print("Warning: 'cr.json' not found. Skipping lines generation.")
+        cr_json = paths.single_cr_json if os.path.exists(paths.single_cr_json) or lines_generator.find_translations(paths.single_cr_json) else None
+        if not cr_json: print("Warning: 'cr.json' not found. Skipping lines generation.")
+        return {aic_file: cr_json for aic_file in aic_files}
+    print(f"\nMultiple AIC configurations found. Looking for 'cr.json' files in '{paths.cr}'.")
+    cr_index = asset_index.get_index(paths.cr)
+    if not cr_index.exists:
+        print(f"Warning: Directory '{paths.cr}' not found. Skipping lines generation.")
+        return {aic_file: None for aic_file in aic_files}
+    cr_matcher = FolderMatcher(cr_index.subdirs)
+    cr_files = {}
+    for aic_file in aic_files:
+        best_cr_folder = cr_matcher.match(os.path.splitext(aic_file)[0])
+        cr_files[aic_file] = os.path.join(paths.cr, best_cr_folder, 'cr.json') if best_cr_folder else None
+        if not best_cr_folder: print(f"Warning: No matching 'cr' subfolder found for '{aic_file}'.")
+    return cr_files
+
+def process_cr_files(cr_json_paths: List[str], processed_chars: dict, output_layout: OutputLayout, default_lang: str, manifest: Union[BuildManifest, None] = None):
+    """Triggers the processing of all planned cr.json files."""
+    # Why: Every cr.json is matched against the same character folders, so the matcher is built only once.
+    folder_matcher = FolderMatcher(list(processed_chars.keys()))
+    # A cr.json matched by several AIC files is only processed once.
+    for cr_json_path in dict.fromkeys(cr_json_paths):
+        run_lines_generator(cr_json_path, processed_chars, folder_matcher, output_layout, default_lang, manifest)
+
+def load_aic_characters(filename: str, paths: ProjectPaths = DEFAULT_PATHS) -> List[dict]:
+    """Reads the list of AI characters from a single AIC file."""
+    profiler.count("read")
+    with open(os.path.join(paths.aic, filename), 'r', encoding='utf-8-sig') as f:
+        return json.load(f).get("AICharacters", [])
+
+def resolve_asset_paths(aic_filename_base: str, asset_matchers: Dict[str, FolderMatcher], is_single_config: bool,
+                        paths: ProjectPaths = DEFAULT_PATHS) -> dict:
+    """Determines all asset source paths for a single AIC file."""
+    def match_in(input_dir: str, key: str) -> Union[str, None]:
+        best_folder = asset_matchers[key].match(aic_filename_base)
+        return os.path.join(input_dir, best_folder) if best_folder else None
+
+    asset_paths = {"aiv": match_in(paths.asset_dirs["aiv"], "aiv")}
+    if is_single_config:
+        asset_paths["portraits"], asset_paths["binks"] = paths.single_portraits, paths.single_binks
+        # Why: The index lookup accepts both 'fx/speech' and 'fx/Speech', preferring the lowercase folder.
+        asset_paths["speech"] = asset_index.get_index(paths.single_fx).find_dir("speech")
     else:
-        print(f"\nMultiple AIC configurations found. Looking for 'cr.json' files in '{CR_INPUT_DIR}'.")
-        if not os.path.isdir(CR_INPUT_DIR):
-            print(f"Warning: Directory '{CR_INPUT_DIR}' not found. Skipping lines generation.")
-            return
-        cr_subfolders = [d for d in os.listdir(CR_INPUT_DIR) if os.path.isdir(os.path.join(CR_INPUT_DIR, d))]
-        for aic_file in aic_files:
-            best_cr_folder = find_best_folder_match(os.path.splitext(aic_file)[0], cr_subfolders)
-            if best_cr_folder:
-                succeeded = lines_generator.generate_lines_files(os.path.join(CR_INPUT_DIR, best_cr_folder, 'cr.json'), existing_folders, OUTPUT_AI_DIR)
-                for folder in succeeded:
-                    if folder in processed_chars: processed_chars[folder]["status"]["lines"] = True
-            else: print(f"Warning: No matching 'cr' subfolder found for '{aic_file}'.")
-
-def parse_cli_args() -> argparse.Namespace:
-    """Sets up and parses command-line arguments."""
+        asset_paths["portraits"] = match_in(paths.asset_dirs["portraits"], "portraits")
+        asset_paths["speech"] = match_in(paths.asset_dirs["speech"], "speech")
+        asset_paths["binks"] = match_in(paths.asset_dirs["binks"], "binks")
+    return asset_paths
+
+def plan_character(character: dict, aic_file: str, folder_name: str, asset_paths: dict, troop_data: dict) -> Dict:
+    """Resolves everything that will be written for a single character without touching the output."""
+    original_name = character["Name"]
+    matched_troops = troop_data.get(original_name) or normalize_troop_entry({})
+    lord_data, start_troops_data = matched_troops["lord"], matched_troops["startTroops"]
+    return {
+        "folder_name": folder_name,
+        "original_name": original_name,
+        "custom_name": character.get("CustomName", ""),
+        "aic_file": aic_file,
+        "asset_dirs": sorted(path for path in asset_paths.values() if path),
+        "character_json": {"lord": lord_data, "startTroops": start_troops_data, "aic": character.get("Personality", {})},
+        "status": {"aic": bool(character.get("Personality")), "lord": bool(lord_data), "startTroops": any(start_troops_data.values())},
+        "assets": {
+            "aiv": plan_aiv_files(original_name, folder_name, asset_paths["aiv"]),
+            "portrait": plan_portrait_files(original_name, asset_paths["portraits"]),
+            "speech": plan_speech_files(original_name, folder_name, asset_paths["speech"]),
+            "binks": plan_binks_files(original_name, folder_name, asset_paths["binks"]),
+        },
+    }
+
+def convert_character(char_plan: dict, output_layout: OutputLayout, manifest: Union[BuildManifest, None] = None, build_key: str = "",
+                      copy_queue: Union[CopyQueue, None] = None) -> dict:
+    """
+    Writes character.json and copies all assets for a single planned character.
+    Why: Each character only touches its own output folder, so this unit of work can safely run on a worker thread.
+    """
+    folder_name = char_plan["folder_name"]
+    if manifest:
+        cached_info = manifest.lookup_character(folder_name, build_key, char_plan["asset_dirs"], output_layout)
+        if cached_info:
+            print(f"  Skipping '{folder_name}': all inputs are unchanged since the last build.")
+            return cached_info
+    char_plan = screen_char_plan(char_plan)
+    with output_layout.open(folder_name, append=False) as sink:
+        return write_character_output(char_plan, sink, manifest, build_key, copy_queue)
+
+def write_character_output(char_plan: dict, sink: Union[DirectorySink, ZipSink], manifest: Union[BuildManifest, None], build_key: str,
+                           copy_queue: Union[CopyQueue, None] = None) -> dict:
+    """
+    Writes character.json and all assets of a planned character into an opened output folder or archive.
+    With a copy_queue the asset copies are only queued; the character is recorded in the manifest once they all succeeded.
+    """
+    folder_name = char_plan["folder_name"]
+    with profiler.track(folder_name, "character"), sink.open_text("character.json") as char_f:
+        json.dump(char_plan["character_json"], char_f, indent=2, ensure_ascii=False)
+    print(f"  Successfully created: {sink.describe('character.json')}")
+
+    copy_log, status = [], dict(char_plan["status"])
+    for stage, asset_plan in char_plan["assets"].items():
+        # Attributes the time and bytes of each stage to this character when '--profile' is on.
+        with profiler.track(folder_name, stage):
+            place = functools.partial(copy_queue.submit, group=folder_name, label=stage) if copy_queue else copy_asset
+            status[stage] = execute_asset_plan(stage, asset_plan, sink, copy_log, place)
+    status["lines"] = False
+    char_info = {
+        "original_name": char_plan["original_name"],
+        "custom_name": char_plan["custom_name"],
+        "aic_file": char_plan["aic_file"],
+        "status": status,
+        "copied_files": copy_log
+    }
+    if manifest:
+        record = lambda: manifest.record_character(folder_name, build_key, char_plan["asset_dirs"], plan_sources(char_plan), char_info,
+                                                   sink.file_signatures(plan_outputs(char_plan)))
+        if copy_queue: copy_queue.defer(folder_name, record)
+        else: record()
+    return char_info
+
+def parse_cli_args(argv: Union[List[str], None] = None) -> argparse.Namespace:
+    """Sets up and parses command-line arguments (from sys.argv unless an explicit list is given)."""
     parser = argparse.ArgumentParser(description="A comprehensive converter for Stronghold Crusader AI assets.")
+    parser.add_argument('command', nargs='?', choices=["convert", "merge", "verify", "batch"], default="convert", help="'convert' (default) converts the project; 'merge' combines the outputs of all '--shard' runs and creates the lines and meta.json files; 'verify' checks an existing output against the current inputs; 'batch' converts every project given by '--projects'/'--projects-file' in one process.")
+    parser.add_argument('--projects', nargs='+', default=None, metavar="ROOT", help="The root folders of the projects converted by the 'batch' command.")
+    parser.add_argument('--projects-file', type=str, default=None, metavar="FILE", help="A file listing the project roots for the 'batch' command (one per line, or a JSON list), relative to the file.")
     parser.add_argument('--author', type=str, default="Unknown", help="Set the author name for meta.json files.")
     parser.add_argument('--defaultLang', type=str, default="de", help="Set the default language (e.g., 'en', 'de') for meta.json files.")
-    return parser.parse_args()
+    parser.add_argument('--jobs', type=int, default=1, help="Number of worker threads used to convert characters in parallel.")
+    parser.add_argument('--link-mode', choices=LINK_MODES, default="copy", help="How asset files are placed in the output: copied, hardlinked, reflinked, symlinked, or 'auto' (reflink or in-kernel copy, falling back to a normal copy).")
+    parser.add_argument('--copy-workers', type=int, default=0, metavar="N", help="Copy asset files on N background threads (largest files first) while characters are processed, with a progress line. 0 copies each file immediately.")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default="folder", help="Write each character as a folder, or stream it straight into one zip archive per character.")
+    parser.add_argument('--dedup', action='store_true', help="Store each distinct asset once in a content-addressed pool (resources/ai_asset_pool) and hardlink it into the character folders.")
+    parser.add_argument('--force', action='store_true', help="Ignore the build manifest and reconvert every character.")
+    parser.add_argument('--hash-inputs', action='store_true', help="Store content hashes in the build manifest so touched but unchanged files do not trigger a rebuild.")
+    parser.add_argument('--dry-run', action='store_true', help="Only resolve and print the planned matches and file operations; nothing is copied or written.")
+    parser.add_argument('--plan-file', type=str, default=None, metavar="PLAN", help="Write the resolved plan (matches and every source -> destination operation) as JSON.")
+    parser.add_argument('--watch', action='store_true', help="After the conversion, keep running and reconvert only the affected characters whenever an input file changes.")
+    parser.add_argument('--watch-interval', type=float, default=1.0, metavar="SECONDS", help="How often '--watch' polls the input folders for changes.")
+    parser.add_argument('--shard', type=sharding.parse_shard_spec, default=None, metavar="K/N", help="Only convert shard K of N (a stable subset of the AIC files) and write a partial status file for the 'merge' command.")
+    parser.add_argument('--validate-assets', choices=asset_probe.PROBE_MODES, default="off", help="Check the header of every source asset (Bink signature and size, RIFF/WAVE chunks, PNG IHDR, non-empty AIV): 'flag' warns about corrupt files, 'skip' also leaves them out, 'off' (default) disables the check.")
+    parser.add_argument('--asset-report', nargs='?', const="asset_report.json", default=None, metavar="REPORT", help="Write the probe result, duration and dimensions of every source asset as JSON (default: asset_report.json).")
+    parser.add_argument('--profile', nargs='?', const="profile_report.json", default=None, metavar="REPORT", help="Record timings, file counts and bytes per phase and per character, and write them as JSON (default: profile_report.json).")
+    parser.add_argument('--profile-top', type=int, default=10, metavar="N", help="Number of slowest characters and asset types listed in the profile summary.")
+    cli_args = parser.parse_args(argv)
+    if cli_args.shard and cli_args.watch: parser.error("'--watch' cannot be combined with '--shard'")
+    if cli_args.asset_report and cli_args.validate_assets == "off": parser.error("'--asset-report' needs '--validate-assets' to be 'flag' or 'skip'")
+    if cli_args.command == "batch" and (cli_args.watch or cli_args.shard or cli_args.plan_file):
+        parser.error("'batch' cannot be combined with '--watch', '--shard' or '--plan-file'")
+    return cli_args
 
 # --- MAIN ORCHESTRATOR ---
-def main(args: argparse.Namespace):
-    """Main function to orchestrate the entire generation process."""
-    cli_args = parse_cli_args()
-    print("Starting AI character file generation script.")
-    if not all(os.path.isdir(p) for p in [AIC_INPUT_DIR, TROOPS_INPUT_DIR, AIV_INPUT_DIR]):
-        print("FATAL ERROR: Could not find all required UCP input directories. Halting.")
-        sys.exit(1)
+def get_build_args(cli_args: argparse.Namespace) -> Dict:
+    """Returns the CLI arguments that influence the output of every character (part of its build key)."""
+    # Why: Assets are probed after the build key is computed, so leaving corrupt files out has to be part of the key.
+    return {"author": cli_args.author, "defaultLang": cli_args.defaultLang, "link_mode": cli_args.link_mode, "output_format": cli_args.output_format, "dedup": cli_args.dedup,
+            "skip_corrupt_assets": cli_args.validate_assets == "skip"}
 
-    troop_data = load_all_troop_data(TROOPS_INPUT_DIR)
-    processed_chars = {}
-    print(f"\nProcessing AI character files from '{AIC_INPUT_DIR}'...")
-    
-    # Pre-scan all asset directories once to avoid repeated OS calls in the loop.
-    asset_folders = { "aiv": [d for d in os.listdir(AIV_INPUT_DIR) if os.path.isdir(os.path.join(AIV_INPUT_DIR, d))], "portraits": [d for d in os.listdir(PORTRAITS_INPUT_DIR) if os.path.isdir(os.path.join(PORTRAITS_INPUT_DIR, d))] if os.path.isdir(PORTRAITS_INPUT_DIR) else [], "speech": [d for d in os.listdir(SPEECH_INPUT_DIR) if os.path.isdir(os.path.join(SPEECH_INPUT_DIR, d))] if os.path.isdir(SPEECH_INPUT_DIR) else [], "binks": [d for d in os.listdir(BINKS_INPUT_DIR) if os.path.isdir(os.path.join(BINKS_INPUT_DIR, d))] if os.path.isdir(BINKS_INPUT_DIR) else [] }
-    aic_files = [f for f in os.listdir(AIC_INPUT_DIR) if f.endswith('.json')]
-    is_single_config = len(aic_files) == 1
-    
-    for filename in aic_files:
+def load_aic_files(aic_files: List[str], executor: Union[ThreadPoolExecutor, None] = None, paths: ProjectPaths = DEFAULT_PATHS) -> Dict[str, List[dict]]:
+    """Reads all AIC files (on worker threads if available), keeping their order."""
+    load = functools.partial(load_aic_characters, paths=paths)
+    return dict(zip(aic_files, executor.map(load, aic_files) if executor else map(load, aic_files)))
+
+def scan_folder_names(aic_files: List[str], executor: Union[ThreadPoolExecutor, None] = None, paths: ProjectPaths = DEFAULT_PATHS) -> List[str]:
+    """
+    Returns the character folder names of all AIC files in plan order, halting on duplicates like build_plan.
+    Only the names are kept, so a streaming conversion knows every folder without holding all AIC files in memory.
+    Why: Each file is parsed again when iter_plan reaches it; that costs about a millisecond per file, while keeping
+         the parsed characters would make the memory use grow with the number of packs.
+    """
+    def read_names(filename: str) -> List[str]:
+        return [sanitize_name(c.get("CustomName") or c["Name"]) for c in load_aic_characters(filename, paths) if c.get("Name")]
+
+    folder_names = {}
+    for names in executor.map(read_names, aic_files) if executor else map(read_names, aic_files):
+        for folder_name in names:
+            if folder_name in folder_names:
+                print(f"\nFATAL ERROR: Duplicate AI name '{folder_name}' detected. Halting.")
+                sys.exit(1)
+            folder_names[folder_name] = None
+    return list(folder_names)
+
+def iter_plan(aic_contents: Iterable[Tuple[str, List[dict]]], asset_matchers: Dict[str, FolderMatcher], troop_data: dict, is_single_config: bool,
+              cr_files: Union[Dict[str, Union[str, None]], None] = None, paths: ProjectPaths = DEFAULT_PATHS) -> Iterator[Tuple[Dict, Dict[str, dict]]]:
+    """
+    Yields the plan of one AIC file at a time: its entry (asset folders, character folders and, if cr_files is given,
+    its cr.json) and the plans of its characters. With a lazy 'aic_contents', each AIC file is only read when its turn comes.
+    """
+    planned_folders = set()
+    for filename, characters in aic_contents:
         print(f"--- Reading file: {filename} ---")
-        aic_filename_base = os.path.splitext(filename)[0]
-        
-        # Determine all asset source paths for the current AIC file.
-        asset_paths = {}
-        asset_paths["aiv"] = os.path.join(AIV_INPUT_DIR, find_best_folder_match(aic_filename_base, asset_folders["aiv"])) if find_best_folder_match(aic_filename_base, asset_folders["aiv"]) else None
-        if is_single_config:
-            asset_paths["portraits"], asset_paths["binks"] = os.path.join("interface_icons2", "Images"), "binks"
-            if os.path.isdir("fx/speech"): asset_paths["speech"] = "fx/speech"
-            elif os.path.isdir("fx/Speech"): asset_paths["speech"] = "fx/Speech"
-            else: asset_paths["speech"] = None
-        else:
-            asset_paths["portraits"] = os.path.join(PORTRAITS_INPUT_DIR, find_best_folder_match(aic_filename_base, asset_folders["portraits"])) if find_best_folder_match(aic_filename_base, asset_folders["portraits"]) else None
-            asset_paths["speech"] = os.path.join(SPEECH_INPUT_DIR, find_best_folder_match(aic_filename_base, asset_folders["speech"])) if find_best_folder_match(aic_filename_base, asset_folders["speech"]) else None
-            asset_paths["binks"] = os.path.join(BINKS_INPUT_DIR, find_best_folder_match(aic_filename_base, asset_folders["binks"])) if find_best_folder_match(aic_filename_base, asset_folders["binks"]) else None
+        asset_paths = resolve_asset_paths(os.path.splitext(filename)[0], asset_matchers, is_single_config, paths)
 
         print(f"  ├─ Matched AIV folder: '{os.path.basename(asset_paths['aiv'])}'" if asset_paths['aiv'] else "  ├─ No matching AIV folder found.")
         print(f"  ├─ Using Portrait path: '{asset_paths['portraits']}'")
         print(f"  ├─ Using Speech path: '{asset_paths['speech']}'")
         print(f"  ├─ Using Binks path: '{asset_paths['binks']}'")
 
-        with open(os.path.join(AIC_INPUT_DIR, filename), 'r', encoding='utf-8-sig') as f:
-            for character in json.load(f).get("AICharacters", []):
-                original_name = character.get("Name")
-                if not original_name: continue
-                folder_name = sanitize_name(character.get("CustomName") or original_name)
-                if folder_name in processed_chars:
-                    print(f"\nFATAL ERROR: Duplicate AI name '{folder_name}' detected. Halting.")
-                    sys.exit(1)
-                
-                output_dir = os.path.join(OUTPUT_AI_DIR, folder_name)
-                os.makedirs(output_dir, exist_ok=True)
-                
-                matched_troops = troop_data.get(original_name, {})
-                lord_data, start_troops_data = matched_troops.get("Lord", {}), {"normal": dict(zip(matched_troops.get("normal", {}).get('Units', []), matched_troops.get("normal", {}).get('Counts', []))), "crusader": dict(zip(matched_troops.get("crusader", {}).get('Units', []), matched_troops.get("crusader", {}).get('Counts', []))), "deathmatch": dict(zip(matched_troops.get("deathmatch", {}).get('Units', []), matched_troops.get("deathmatch", {}).get('Counts', [])))}
-                with open(os.path.join(output_dir, "character.json"), 'w', encoding='utf-8') as char_f:
-                    json.dump({"lord": lord_data, "startTroops": start_troops_data, "aic": character.get("Personality", {})}, char_f, indent=2, ensure_ascii=False)
-                print(f"  Successfully created: {os.path.join(output_dir, 'character.json')}")
-
-                processed_chars[folder_name] = {
-                    "original_name": original_name,
-                    "custom_name": character.get("CustomName", ""),
-                    "aic_file": filename,
-                    "status": {
-                        "aic": bool(character.get("Personality")), "lord": bool(lord_data), "startTroops": any(start_troops_data.values()),
-                        "aiv": process_aiv_files(original_name, folder_name, output_dir, asset_paths["aiv"]),
-                        "portrait": process_portrait_files(original_name, output_dir, asset_paths["portraits"]),
-                        "speech": process_speech_files(original_name, folder_name, output_dir, asset_paths["speech"]),
-                        "binks": process_binks_files(original_name, folder_name, output_dir, asset_paths["binks"]),
-                        "lines": False
-                    }
-                }
-    
-    process_cr_files(aic_files, processed_chars)
+        aic_entry, char_plans = {"file": filename, "asset_paths": asset_paths, "characters": []}, {}
+        for character in characters:
+            original_name = character.get("Name")
+            if not original_name: continue
+            folder_name = sanitize_name(character.get("CustomName") or original_name)
+            if folder_name in planned_folders:
+                print(f"\nFATAL ERROR: Duplicate AI name '{folder_name}' detected. Halting.")
+                sys.exit(1)
+            planned_folders.add(folder_name)
+            char_plans[folder_name] = plan_character(character, filename, folder_name, asset_paths, troop_data)
+            aic_entry["characters"].append(folder_name)
+        if cr_files is not None: aic_entry["cr_json"] = cr_files[filename]
+        yield aic_entry, char_plans
+
+def build_plan(aic_contents: Dict[str, List[dict]], asset_matchers: Dict[str, FolderMatcher], troop_data: dict,
+               is_single_config: Union[bool, None] = None, paths: ProjectPaths = DEFAULT_PATHS) -> Dict:
+    """
+    Resolves every AIC file to its asset folders and cr.json, and every character to its file operations.
+    Why: The plan is built from folder indexes only, so it can be inspected ('--dry-run') without any copying.
+         When only a shard of the AIC files is planned, is_single_config must describe the whole project.
+    """
+    aic_files = list(aic_contents.keys())
+    if is_single_config is None: is_single_config = len(aic_files) == 1
+    plan = {"aic_files": [], "characters": {}}
+    for aic_entry, char_plans in iter_plan(aic_contents.items(), asset_matchers, troop_data, is_single_config, paths=paths):
+        plan["aic_files"].append(aic_entry)
+        plan["characters"].update(char_plans)
+
+    cr_files = plan_cr_files(aic_files, is_single_config, paths)
+    for aic_entry in plan["aic_files"]: aic_entry["cr_json"] = cr_files[aic_entry["file"]]
+    return plan
+
+def print_plan(plan: Dict):
+    """Prints the file operations of every planned character."""
+    print("\n--- Dry run: planned operations ---")
+    total_copies = 0
+    for aic_entry in plan["aic_files"]:
+        print(f"{aic_entry['file']} (cr.json: {aic_entry['cr_json'] or 'none'})")
+        for folder_name in aic_entry["characters"]:
+            char_plan = plan["characters"][folder_name]
+            stage_counts = {stage: len({relpath for _, relpath in asset_plan["copies"]}) if asset_plan else 0 for stage, asset_plan in char_plan["assets"].items()}
+            total_copies += sum(stage_counts.values())
+            print(f"  ├─ {folder_name} ({char_plan['original_name']}): " + ", ".join(f"{stage}: {count}" for stage, count in stage_counts.items()))
+    print(f"\n{len(plan['characters'])} characters, {total_copies} asset files would be placed.")
+
+def plan_entries(plan: Dict) -> Iterator[Tuple[Dict, Dict[str, dict]]]:
+    """Yields a complete plan per AIC file, in the same form as iter_plan."""
+    for aic_entry in plan["aic_files"]:
+        yield aic_entry, {folder_name: plan["characters"][folder_name] for folder_name in aic_entry["characters"]}
+
+def finalize_characters(cr_json_paths: List[str], processed_chars: Dict[str, dict], cli_args: argparse.Namespace,
+                        output_layout: OutputLayout, manifest: Union[BuildManifest, None] = None):
+    """Runs the phases that need all converted characters: lines generation and meta.json creation."""
+    with profiler.phase("lines"):
+        process_cr_files(cr_json_paths, processed_chars, output_layout, cli_args.defaultLang, manifest)
 
     print("\n--- Creating meta.json files ---")
-    for folder_name, char_info in processed_chars.items():
-        create_meta_json(folder_name, char_info, cli_args)
+    with profiler.phase("meta"):
+        for folder_name, char_info in processed_chars.items():
+            create_meta_json(folder_name, char_info, cli_args, output_layout)
+
+def merge_shards(cli_args: argparse.Namespace, paths: ProjectPaths = DEFAULT_PATHS):
+    """
+    Combines the character folders of all shards (copied into one output folder) and runs the lines and meta.json
+    phases over them, giving the same result as converting the whole project on a single node.
+    """
+    output_base = paths.output_base
+    print(f"Merging shard outputs in '{output_base}'...")
+    try:
+        statuses = sharding.load_shard_statuses(output_base)
+    except (OSError, ValueError) as e:
+        print(f"FATAL ERROR: {e} Halting.")
+        sys.exit(1)
+    for status in statuses:
+        if status["output_format"] != cli_args.output_format:
+            print(f"FATAL ERROR: Shard {status['shard'][0]}/{status['shard'][1]} was written with '--output-format={status['output_format']}'. Halting.")
+            sys.exit(1)
+
+    shard_aic_files = {aic_file: status for status in statuses for aic_file in status["aic_files"]}
+    aic_files = [f for f in os.listdir(paths.aic) if f.endswith('.json')]
+    unknown_files = sorted(set(shard_aic_files) - set(aic_files))
+    missing_files = [f for f in aic_files if f not in shard_aic_files]
+    if unknown_files or missing_files:
+        print(f"FATAL ERROR: The shards were converted from different AIC files (missing: {missing_files}, unknown: {unknown_files}). Halting.")
+        sys.exit(1)
+
+    # Why: Characters are collected in the same order as a single-node run (AIC listing order, then file order),
+    #      because the folder matching of the lines generator depends on that order.
+    output_layout = OutputLayout(paths.output_ai, cli_args.output_format, cli_args.link_mode)
+    processed_chars = {}
+    for aic_file in aic_files:
+        status = shard_aic_files[aic_file]
+        for folder_name in status["aic_files"][aic_file]:
+            if folder_name in processed_chars:
+                print(f"\nFATAL ERROR: Duplicate AI name '{folder_name}' detected. Halting.")
+                sys.exit(1)
+            if not output_layout.has_file(folder_name, "character.json"):
+                print(f"FATAL ERROR: The output of '{folder_name}' (shard {status['shard'][0]}/{status['shard'][1]}) is missing in '{paths.output_ai}'. Halting.")
+                sys.exit(1)
+            char_info = status["characters"][folder_name]
+            processed_chars[folder_name] = dict(char_info, status=dict(char_info["status"], lines=False), copied_files=[])
+    print(f"Collected {len(processed_chars)} characters from {len(statuses)} shards.")
+
+    cr_files = plan_cr_files(aic_files, paths=paths)
+    finalize_characters([cr_files[aic_file] for aic_file in aic_files if cr_files[aic_file]], processed_chars, cli_args, output_layout)
+    print(f"\nMerge complete. All files have been generated in '{paths.output_ai}'.")
+
+class CharacterFinalizer:
+    """
+    Generates the lines and writes the meta.json of each character as soon as everything it depends on is done.
+    Why: Lines are matched against all character folders, and a cr.json may write into the folder of another AIC file.
+         So the folders of every cr.json are determined up front from the cr.json files and the folder names alone.
+         A cr.json is processed once all of its folders are converted, in plan order so that a later one still wins.
+         A character is finalized once its copies and every cr.json that writes to it are done.
+         The output is the same as running all lines and then all meta.json files at the end.
+    """
+
+    def __init__(self, cr_json_paths: List[str], folder_names: List[str], cli_args: argparse.Namespace, output_layout: OutputLayout,
+                 manifest: Union[BuildManifest, None] = None, copy_queue: Union[CopyQueue, None] = None, write_meta: bool = True):
+        self.cli_args, self.output_layout, self.manifest, self.copy_queue = cli_args, output_layout, manifest, copy_queue
+        # Without meta.json files ('--shard'), a character is finished as soon as its copies are done.
+        self.write_meta = write_meta
+        self.folder_matcher = FolderMatcher(folder_names)
+        # A cr.json matched by several AIC files is only processed once.
+        self.pending_cr = deque(dict.fromkeys(cr_json_paths))
+        self.targets = {cr_json_path: self.lines_targets(cr_json_path) for cr_json_path in self.pending_cr}
+        self.waiting = Counter(folder for targets in self.targets.values() for folder in targets)
+        self.converted: List[str] = []
+        self.finished = set()
+
+    def lines_targets(self, cr_json_path: str) -> List[str]:
+        """The folders a cr.json will write lines to: taken from the build manifest if unchanged, otherwise matched."""
+        language_files = lines_generator.find_language_files(cr_json_path, self.cli_args.defaultLang)
+        cached = self.manifest.lookup_lines(cr_json_path, language_files, self.folder_matcher.folders, self.output_layout, claim=False) if self.manifest else None
+        return list(cached) if cached is not None else lines_generator.match_lines_targets(language_files, self.folder_matcher)
+
+    def advance(self, processed_chars: Dict[str, dict], wait: bool = False) -> List[str]:
+        """
+        Processes every cr.json and finalizes every converted character that is ready; returns the finalized characters.
+        With wait=True (after the last AIC file), all remaining cr.json files are processed and pending copies are waited for.
+        A finalized character is never written to again, so the caller may drop it from processed_chars.
+        """
+        with profiler.phase("lines"):
+            while self.pending_cr and (wait or all(folder in processed_chars for folder in self.targets[self.pending_cr[0]])):
+                cr_json_path = self.pending_cr.popleft()
+                succeeded = run_lines_generator(cr_json_path, processed_chars, self.folder_matcher, self.output_layout, self.cli_args.defaultLang, self.manifest)
+                for folder in self.targets[cr_json_path]: self.waiting[folder] -= 1
+                # Only if a cr.json changed during the run can it reach a folder that was already finalized.
+                for folder in self.finished.intersection(succeeded): update_meta_lines(folder, list(succeeded[folder]), self.cli_args, self.output_layout)
+
+        with profiler.phase("meta"):
+            unfinished, finished = [], []
+            for folder_name in self.converted:
+                if self.waiting[folder_name] or not self._copies_done(folder_name, processed_chars, wait):
+                    unfinished.append(folder_name)
+                    continue
+                if self.write_meta: create_meta_json(folder_name, processed_chars[folder_name], self.cli_args, self.output_layout)
+                finished.append(folder_name)
+            self.converted = unfinished
+            self.finished.update(finished)
+        return finished
+
+    def _copies_done(self, folder_name: str, processed_chars: Dict[str, dict], wait: bool) -> bool:
+        if not self.copy_queue: return True
+        errors = self.copy_queue.finish(folder_name, wait)
+        if errors is None: return False
+        for _, stage, source_file, target, error in errors:
+            print(f"ERROR: Could not copy '{source_file}' to '{target}'. Details: {error}")
+            processed_chars[folder_name]["status"][stage] = False
+        return True
+
+class RunTotals:
+    """
+    Running totals of a conversion. Each character is added once it is finalized, so its info can be dropped right away.
+    Why: Holding the info and copy log of every character until the end would grow with the size of the project.
+    """
+
+    def __init__(self, keep_statuses: bool = False):
+        self.characters = 0
+        self.placed_files = 0
+        self.mode_counts = Counter()
+        # Only a shard keeps the status of every character, which its status file lists for the 'merge' command.
+        self.statuses: Union[Dict[str, dict], None] = {} if keep_statuses else None
+
+    def add(self, folder_name: str, char_info: dict):
+        self.characters += 1
+        self.placed_files += len(char_info["copied_files"])
+        self.mode_counts.update(mode for _, _, mode in char_info["copied_files"])
+        if self.statuses is not None: self.statuses[folder_name] = {k: v for k, v in char_info.items() if k != "copied_files"}
+
+def execute_plan(entries: Iterable[Tuple[Dict, Dict[str, dict]]], folder_names: List[str], cr_json_paths: List[str], cli_args: argparse.Namespace,
+                 output_layout: OutputLayout, manifest: BuildManifest, executor: Union[ThreadPoolExecutor, None] = None,
+                 retain: bool = False) -> Tuple[RunTotals, Dict[str, dict]]:
+    """
+    Carries out a plan as a pipeline over its AIC files (see iter_plan): converts the characters of each AIC file,
+    then generates the lines and writes the meta.json of every character that is ready (see CharacterFinalizer).
+    Returns the totals of the run and the info of the characters that are still held: every character with
+    retain=True ('--watch' keeps using them), otherwise none.
+    Why: The first character is finished right away instead of after the whole project, and a lazy 'entries'
+         only holds the plans of the AIC files in flight and the info of the characters that are not finalized yet.
+    """
+    build_args = get_build_args(cli_args)
+    processed_chars, aic_entries = {}, []
+    totals = RunTotals(keep_statuses=bool(cli_args.shard))
+    # Why: Members of one zip archive cannot be written concurrently, so the copy queue is only used for folder output.
+    copy_queue = CopyQueue(cli_args.copy_workers, copy_asset) if cli_args.copy_workers > 0 and output_layout.output_format == "folder" else None
+    # Why: Lines and meta.json depend on all characters, so a shard leaves them to the 'merge' command.
+    finalizer = CharacterFinalizer([] if cli_args.shard else cr_json_paths, folder_names, cli_args, output_layout, manifest, copy_queue,
+                                   write_meta=not cli_args.shard)
+
+    def add_finished(finished: List[str]):
+        for folder_name in finished:
+            totals.add(folder_name, processed_chars[folder_name])
+            if not retain: del processed_chars[folder_name]
+
+    entries, in_flight = iter(entries), deque()
+    while True:
+        with profiler.phase("plan"):
+            entry = next(entries, None)
+        if entry:
+            aic_entry, char_plans = entry
+            with profiler.phase("convert_characters"):
+                pending_chars = {}
+                for folder_name, char_plan in char_plans.items():
+                    task_args = (char_plan, output_layout, manifest, fingerprint(char_plan, build_args), copy_queue)
+                    pending_chars[folder_name] = executor.submit(profiler.bind(convert_character), *task_args) if executor else convert_character(*task_args)
+            in_flight.append((aic_entry, pending_chars))
+        # Why: With worker threads, the next AIC file is already being converted while the previous one is finalized.
+        if in_flight and (not entry or not executor or len(in_flight) > 1):
+            aic_entry, pending_chars = in_flight.popleft()
+            with profiler.phase("convert_characters"):
+                # Results are gathered in plan order, which the folder matching of the lines generator depends on.
+                for folder_name, result in pending_chars.items():
+                    processed_chars[folder_name] = result.result() if executor else result
+            aic_entries.append(aic_entry)
+            finalizer.converted.extend(aic_entry["characters"])
+            add_finished(finalizer.advance(processed_chars))
+        if not entry and not in_flight: break
+
+    # Why: Waiting for all copies of every character also finishes every group of the copy queue before it is drained.
+    add_finished(finalizer.advance(processed_chars, wait=True))
+    if copy_queue: copy_queue.drain()
+    if cli_args.shard:
+        # The status file lists the characters in plan order, whatever order their copies finished in.
+        statuses = {folder_name: totals.statuses[folder_name] for aic_entry in aic_entries for folder_name in aic_entry["characters"]}
+        sharding.write_shard_status(os.path.dirname(output_layout.base_dir), cli_args.shard, {"aic_files": aic_entries}, statuses, cli_args.output_format)
+    with profiler.phase("save_manifest"):
+        manifest.save()
+
+    if totals.mode_counts:
+        print("\nAsset files placed by method: " + ", ".join(f"{mode}: {count}" for mode, count in sorted(totals.mode_counts.items())))
+    if output_layout.pool: print(output_layout.pool.summary())
+    return totals, processed_chars
+
+def verify_output(plan: Dict, cli_args: argparse.Namespace, paths: ProjectPaths = DEFAULT_PATHS) -> bool:
+    """
+    Checks the existing output of every planned character: mapping targets, meta.json 'switched' flags,
+    mapping contents, and every asset file against its source (size first, then content hash).
+    Returns True if no problems were found.
+    """
+    if cli_args.output_format != "folder":
+        print("FATAL ERROR: 'verify' only supports folder output. Halting.")
+        sys.exit(1)
+    output_layout = OutputLayout(paths.output_ai)
+    checksums = output_verifier.ChecksumCache(os.path.join(paths.output_base, output_verifier.CHECKSUM_CACHE_FILENAME))
+    problems: Dict[str, List[str]] = {}
+    pairs = []
+    with profiler.phase("verify_folders"):
+        for folder_name, char_plan in plan["characters"].items():
+            folder_path = output_layout.location(folder_name)
+            if not os.path.isdir(folder_path):
+                problems[folder_name] = ["The output folder is missing"]
+                continue
+            folder_problems = output_verifier.check_folder(folder_path)
+            for stage, asset_plan in char_plan["assets"].items():
+                if not asset_plan: continue
+                if asset_plan["found"] and asset_plan["mapping_file"]:
+                    folder_problems += output_verifier.check_mapping(folder_path, asset_plan["mapping_file"], asset_plan["mappings"])
+                # Same resolution as execute_asset_plan: the last copy to a destination wins.
+                for relpath, source_file in {relpath: source for source, relpath in asset_plan["copies"]}.items():
+                    pairs.append((folder_name, source_file, os.path.join(folder_path, *relpath.split("/"))))
+            if folder_problems: problems[folder_name] = folder_problems
+    with profiler.phase("verify_assets"):
+        for folder_name, asset_problems in output_verifier.compare_assets(pairs, checksums, cli_args.jobs if cli_args.jobs > 1 else os.cpu_count() or 1).items():
+            problems.setdefault(folder_name, []).extend(asset_problems)
+    checksums.save()
+
+    for folder_name in plan["characters"]:
+        if folder_name not in problems: continue
+        print(f"\n  - {folder_name}:")
+        for problem in problems[folder_name]: print(f"    - {problem}")
+    problem_count = sum(len(p) for p in problems.values())
+    print(f"\nVerified {len(plan['characters'])} characters and {len(pairs)} asset files "
+          f"({checksums.misses} hashed, {checksums.hits} from the checksum cache): "
+          f"{problem_count} problem(s) in {len(problems)} character(s).")
+    return not problems
+
+def run_watch(cli_args: argparse.Namespace, troop_data: dict, aic_contents: Dict[str, List[dict]], asset_matchers: Dict[str, FolderMatcher],
+              plan: Dict, processed_chars: Dict[str, dict], output_layout: OutputLayout, manifest: BuildManifest, paths: ProjectPaths = DEFAULT_PATHS):
+    """
+    Keeps the troop data, AIC files, folder matches and asset indexes in memory and, whenever an input changes,
+    reconverts only the affected characters, lines.json and meta.json files. Runs until interrupted (Ctrl+C).
+    """
+    build_args = get_build_args(cli_args)
+    # Translations of a single configuration's cr.json lie in the project root, which is not watched as a whole.
+    watcher = TreeWatcher(paths.watched + sorted(lines_generator.find_translations(paths.single_cr_json).values()))
+    executor = ThreadPoolExecutor(max_workers=cli_args.jobs) if cli_args.jobs > 1 else None
+    print(f"\nWatching {', '.join(paths.watched)} for changes every {cli_args.watch_interval}s. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(cli_args.watch_interval)
+            changed = set(watcher.poll())
+            if not changed: continue
+            start = time.perf_counter()
+            print(f"\n--- Detected {len(changed)} changed path(s) ---")
+
+            # Refresh only the in-memory inputs that are touched by the changes.
+            for path in changed:
+                asset_index.invalidate(path)
+                asset_index.invalidate(os.path.dirname(path))
+            if any(is_within(path, paths.troops) for path in changed):
+                troop_data = load_all_troop_data(paths.troops, paths.troop_cache)
+            if any(is_within(path, paths.aic) for path in changed):
+                aic_files = [f for f in os.listdir(paths.aic) if f.endswith('.json')]
+                aic_contents = {f: aic_contents[f] if f in aic_contents and os.path.join(paths.aic, f) not in changed else load_aic_characters(f, paths) for f in aic_files}
+            for key, path in paths.asset_dirs.items():
+                # Why: Folder matches only change when a pack folder is added, removed or renamed.
+                if any(os.path.dirname(p) == path or p == path for p in changed):
+                    asset_matchers[key] = FolderMatcher(asset_index.get_index(path).subdirs)
+
+            try:
+                new_plan = build_plan(aic_contents, asset_matchers, troop_data, paths=paths)
+            except SystemExit:
+                print("Waiting for the inputs to be fixed...")
+                continue
+
+            # A character is affected when its plan changed or when one of its source files was modified.
+            affected = [folder_name for folder_name, char_plan in new_plan["characters"].items()
+                        if plan["characters"].get(folder_name) != char_plan
+                        or any(os.path.normpath(source_file) in changed for asset_plan in char_plan["assets"].values() if asset_plan for source_file, _ in asset_plan["copies"])]
+            for folder_name in [f for f in plan["characters"] if f not in new_plan["characters"]]:
+                print(f"  Character '{folder_name}' was removed; its output '{output_layout.location(folder_name)}' is left in place.")
+                processed_chars.pop(folder_name, None)
+                manifest.forget_character(folder_name)
+            names_changed = set(new_plan["characters"]) != set(plan["characters"])
+            plan = new_plan
+
+            pending_chars = {}
+            for folder_name in affected:
+                char_plan = plan["characters"][folder_name]
+                build_key = fingerprint(char_plan, build_args)
+                task_args = (char_plan, output_layout, None, build_key)
+                pending_chars[folder_name] = (build_key, executor.submit(convert_character, *task_args) if executor else convert_character(*task_args))
+            for folder_name, (build_key, result) in pending_chars.items():
+                processed_chars[folder_name] = result.result() if executor else result
+                char_plan = screen_char_plan(plan["characters"][folder_name])
+                outputs = output_layout.file_signatures(folder_name, plan_outputs(char_plan))
+                manifest.record_character(folder_name, build_key, char_plan["asset_dirs"], plan_sources(char_plan), processed_chars[folder_name], outputs)
+            # Keep the character order of the plan, which the lines and meta phases rely on.
+            for folder_name in plan["characters"]: processed_chars[folder_name] = processed_chars.pop(folder_name)
+
+            # Lines are regenerated for changed cr.json files and for the AIC files of rebuilt characters,
+            # or for all cr.json files when characters were added or removed (the name matching changes).
+            touched = set(affected)
+            cr_json_paths = [aic_entry["cr_json"] for aic_entry in plan["aic_files"] if aic_entry["cr_json"]
+                             and (names_changed or touched.intersection(aic_entry["characters"])
+                                  or any(os.path.dirname(path) == os.path.dirname(os.path.normpath(aic_entry["cr_json"])) and lines_generator.is_cr_file(os.path.basename(path)) for path in changed))]
+            folder_matcher = FolderMatcher(list(processed_chars.keys()))
+            for cr_json_path in dict.fromkeys(cr_json_paths):
+                succeeded = run_lines_generator(cr_json_path, processed_chars, folder_matcher, output_layout, cli_args.defaultLang, manifest, reuse=False)
+                touched.update(succeeded)
+
+            for folder_name in processed_chars:
+                if folder_name in touched: create_meta_json(folder_name, processed_chars[folder_name], cli_args, output_layout)
+            manifest.save()
+            print(f"--- Updated {len(affected)} character(s) and {len(set(cr_json_paths))} lines file set(s) in {time.perf_counter() - start:.2f}s ---")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        if executor: executor.shutdown(wait=True)
+
+class SharedResources:
+    """
+    Inputs that the projects of one 'batch' run can reuse: parsed troop data and folder matchers.
+    Why: Mod projects are usually built on the same troop files and pack names, so the troop files are parsed
+         and the fuzzy folder matches are computed once per process instead of once per project.
+    """
+
+    def __init__(self):
+        self.troops: Dict[tuple, dict] = {}
+        self.matchers: Dict[tuple, FolderMatcher] = {}
+
+    def matcher(self, folders: List[str]) -> FolderMatcher:
+        key = tuple(folders)
+        if key not in self.matchers: self.matchers[key] = FolderMatcher(folders)
+        return self.matchers[key]
+
+
+def convert_project(cli_args: argparse.Namespace, paths: ProjectPaths = DEFAULT_PATHS, executor: Union[ThreadPoolExecutor, None] = None,
+                    shared: Union[SharedResources, None] = None) -> Dict:
+    """
+    Plans and converts (or verifies, or only prints with '--dry-run') one project.
+    Returns the in-memory state of the run, which '--watch' keeps using afterwards.
+    """
+    if not all(os.path.isdir(p) for p in [paths.aic, paths.troops, paths.aiv]):
+        print("FATAL ERROR: Could not find all required UCP input directories. Halting.")
+        sys.exit(1)
+
+    with profiler.phase("load_troop_data"):
+        # Why: A dry run or 'verify' must not write anything, not even the troop cache.
+        read_only = cli_args.dry_run or cli_args.command == "verify"
+        troop_data = load_all_troop_data(paths.troops, paths.troop_cache, cli_args.force, shared.troops if shared else None, save=not read_only)
+    print(f"\nProcessing AI character files from '{paths.aic}'...")
+    
+    # Pre-scan all asset directories once and build one matcher per directory to avoid repeated work in the loop.
+    with profiler.phase("scan_asset_folders"):
+        make_matcher = shared.matcher if shared else FolderMatcher
+        asset_matchers = {key: make_matcher(asset_index.get_index(path).subdirs) for key, path in paths.asset_dirs.items()}
+        profiler.count("listdir")
+        aic_files = [f for f in os.listdir(paths.aic) if f.endswith('.json')]
+    is_single_config = len(aic_files) == 1
+    if cli_args.shard:
+        aic_files = sharding.select_shard(aic_files, cli_args.shard)
+        print(f"Shard {cli_args.shard[0]}/{cli_args.shard[1]}: converting {len(aic_files)} AIC file(s).")
+
+    state = {"troop_data": troop_data, "asset_matchers": asset_matchers, "aic_contents": None, "plan": None,
+             "processed_chars": {}, "totals": None, "output_layout": None, "manifest": None, "verified": None}
+    # Why: A plain conversion streams the AIC files through the pipeline of execute_plan. The complete plan is only
+    #      built when it is printed, written to a file, verified, or kept in memory for '--watch'.
+    if cli_args.dry_run or cli_args.plan_file or cli_args.watch or cli_args.command == "verify":
+        with profiler.phase("plan"):
+            state["aic_contents"] = load_aic_files(aic_files, executor, paths)
+            state["plan"] = plan = build_plan(state["aic_contents"], asset_matchers, troop_data, is_single_config, paths)
+        # A plan that is printed, stored or verified shows the result of the asset check for every character,
+        # while the conversion itself only probes the characters it rebuilds (see convert_character).
+        screened_plan = screen_plan(plan) if cli_args.dry_run or cli_args.plan_file or cli_args.command == "verify" else plan
+        if cli_args.plan_file:
+            with open(cli_args.plan_file, 'w', encoding='utf-8') as f: json.dump(screened_plan, f, indent=2, ensure_ascii=False)
+            print(f"\nPlan written to '{cli_args.plan_file}'.")
+        if cli_args.dry_run:
+            print_plan(screened_plan)
+            return state
+        if cli_args.command == "verify":
+            state["verified"] = verify_output(screened_plan, cli_args, paths)
+            return state
+        entries, folder_names = plan_entries(plan), list(plan["characters"])
+        cr_json_paths = [aic_entry["cr_json"] for aic_entry in plan["aic_files"] if aic_entry["cr_json"]]
+    else:
+        with profiler.phase("plan"):
+            folder_names = scan_folder_names(aic_files, executor, paths)
+            cr_files = plan_cr_files(aic_files, is_single_config, paths)
+        # Each AIC file is only read when the pipeline reaches it, so only the AIC files in flight are held.
+        entries = iter_plan(((f, load_aic_characters(f, paths)) for f in aic_files), asset_matchers, troop_data, is_single_config, cr_files, paths)
+        cr_json_paths = [cr_files[f] for f in aic_files if cr_files[f]]
+
+    # Why: Each shard keeps its own build manifest, so several shards can be built in the same folder.
+    manifest_filename = MANIFEST_FILENAME.replace(".json", f".shard_{cli_args.shard[0]}_of_{cli_args.shard[1]}.json") if cli_args.shard else MANIFEST_FILENAME
+    state["manifest"] = manifest = BuildManifest(os.path.join(paths.output_base, manifest_filename), cli_args.hash_inputs, cli_args.force)
+    pool = AssetPool(os.path.join(paths.output_base, ASSET_POOL_DIRNAME), cli_args.link_mode) if cli_args.dedup else None
+    state["output_layout"] = output_layout = OutputLayout(paths.output_ai, cli_args.output_format, cli_args.link_mode, pool)
+    state["totals"], state["processed_chars"] = execute_plan(entries, folder_names, cr_json_paths, cli_args, output_layout, manifest, executor,
+                                                             retain=cli_args.watch)
+    return state
+
+
+def read_project_list(cli_args: argparse.Namespace) -> List[str]:
+    """Collects the project roots of a 'batch' run from '--projects' and '--projects-file' (one root per line or a JSON list)."""
+    roots = list(cli_args.projects or [])
+    if cli_args.projects_file:
+        base_dir = os.path.dirname(cli_args.projects_file)
+        with open(cli_args.projects_file, 'r', encoding='utf-8-sig') as f:
+            if cli_args.projects_file.lower().endswith('.json'): listed = json.load(f)
+            else: listed = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+        # Relative roots in a project list are relative to the list itself.
+        roots += [os.path.join(base_dir, root) for root in listed]
+    return list(dict.fromkeys(os.path.normpath(root) for root in roots))
+
+def run_batch(cli_args: argparse.Namespace):
+    """
+    Converts several projects in one process, sharing the troop data, the folder matchers and the worker pool.
+    A project that fails is reported and skipped; the other projects are still converted.
+    """
+    roots = read_project_list(cli_args)
+    if not roots:
+        print("FATAL ERROR: No projects given. Use '--projects' or '--projects-file'. Halting.")
+        sys.exit(1)
+    shared = SharedResources()
+    summaries = []
+    executor = ThreadPoolExecutor(max_workers=cli_args.jobs) if cli_args.jobs > 1 else None
+    try:
+        for index, root in enumerate(roots, 1):
+            print(f"\n=== Project {index}/{len(roots)}: '{root}' ===")
+            start = time.perf_counter()
+            try:
+                with profiler.phase(f"project:{root}"):
+                    state = convert_project(cli_args, ProjectPaths(root), executor, shared)
+            except SystemExit:
+                summaries.append((root, "FAILED", 0, 0, time.perf_counter() - start))
+                continue
+            except Exception as e:  # Why: One broken project must not stop the conversion of the others.
+                print(f"ERROR: Could not convert '{root}'. Details: {e}")
+                summaries.append((root, "FAILED", 0, 0, time.perf_counter() - start))
+                continue
+            totals = state["totals"]
+            summaries.append((root, "ok", totals.characters if totals else 0, totals.placed_files if totals else 0, time.perf_counter() - start))
+    finally:
+        if executor: executor.shutdown(wait=True)
+
+    print("\n--- Batch summary ---")
+    width = max(len(root) for root in roots)
+    for root, result, characters, placed_files, seconds in summaries:
+        print(f"  {root:<{width}}  {result:<6}  {characters:>4} characters  {placed_files:>6} files placed  {seconds:7.2f}s")
+    failed = sum(1 for _, result, _, _, _ in summaries if result != "ok")
+    print(f"{len(summaries) - failed} of {len(summaries)} project(s) converted, {len(shared.troops)} distinct troop set(s) parsed.")
+    if failed: sys.exit(1)
+
+def finish_asset_probe(cli_args: argparse.Namespace, prober: Union[asset_probe.AssetProber, None]):
+    """Reports the result of asset probing, writes the optional sidecar report and switches probing off again."""
+    if not prober: return
+    if any(result["problem"] for result in prober.results.values()): print("\n" + prober.summary())
+    if cli_args.asset_report: prober.write_report(cli_args.asset_report)
+    asset_probe.disable()
+
+def main(args: argparse.Namespace):
+    """Main function to orchestrate the entire generation process."""
+    cli_args = args
+    print("Starting AI character file generation script.")
+    if cli_args.command == "merge":
+        merge_shards(cli_args)
+        return
+
+    # Why: Without '--profile' no profiler exists and every instrumented call site reduces to a None check.
+    active_profiler = profiler.enable() if cli_args.profile else None
+    active_prober = asset_probe.enable(cli_args.validate_assets)
+    if cli_args.command == "batch":
+        try:
+            run_batch(cli_args)
+        finally:
+            if active_profiler:
+                active_profiler.write_report(cli_args.profile, cli_args.profile_top)
+                profiler.disable()
+            finish_asset_probe(cli_args, active_prober)
+        return
+
+    # Why: With '--jobs 1' no pool is created, so the script behaves exactly like a plain sequential run.
+    #      Otherwise AIC files are read and characters converted on worker threads, while name checks stay
+    #      on this thread in file order so duplicate detection and the output order remain deterministic.
+    executor = ThreadPoolExecutor(max_workers=cli_args.jobs) if cli_args.jobs > 1 else None
+    try:
+        state = convert_project(cli_args, DEFAULT_PATHS, executor)
+    finally:
+        if executor: executor.shutdown(wait=True)
+
+    if active_profiler:
+        active_profiler.write_report(cli_args.profile, cli_args.profile_top)
+        profiler.disable()
+    if not cli_args.watch: finish_asset_probe(cli_args, active_prober)
 
-    print(f"\nProcessing complete. All files have been generated in '{OUTPUT_AI_DIR}'.")
+    if cli_args.command == "verify" and not cli_args.dry_run:
+        print("\nVerification passed." if state["verified"] else "\nVerification FAILED.")
+        if not state["verified"]: sys.exit(1)
+        return
+    if cli_args.dry_run: print("\nDry run complete. No files were written.")
+    else: print(f"\nProcessing complete. All files have been generated in '{DEFAULT_PATHS.output_ai}'.")
+    if cli_args.watch and not cli_args.dry_run:
+        try:
+            run_watch(cli_args, state["troop_data"], state["aic_contents"], state["asset_matchers"], state["plan"], state["processed_chars"],
+                      state["output_layout"], state["manifest"], DEFAULT_PATHS)
+        finally:
+            finish_asset_probe(cli_args, active_prober)
 
 if __name__ == "__main__":
     main(parse_cli_args())
\ No newline at end of file
@@ -2,11 +2,13 @@
 
 import json
 import os
-from difflib import SequenceMatcher
-from typing import List, Dict, Tuple, Union
-from shared_utils import find_best_folder_match
+import re
+from contextlib import closing
+from typing import List, Dict, Tuple, Union, Iterator, TextIO
+import profiler
+from output_sink import OutputLayout, write_text
+from shared_utils import FolderMatcher
 
-# (All constants and helper functions remain the same as the previous version)
 # --- CONFIGURATION CONSTANTS ---
 NUM_AIS = 16
 NUM_TITLES_PER_AI = 8
@@ -27,19 +29,108 @@ OUTPUT_KEYS_ORDER = [
     "description", "newline",
 ] + DIALOGUE_KEYS
 
+# --- LANGUAGES ---
+# 'cr.json' holds the text of the default language; translations are placed next to it as 'cr_<lang>.json'.
+CR_TRANSLATION_PATTERN = re.compile(r"^cr_([A-Za-z]{2,3}(?:[-_][A-Za-z0-9]+)?)\.json$", re.IGNORECASE)
+
+# --- CR.JSON EXTRACTION ---
+CR_READ_CHUNK_SIZE = 1024 * 1024
+JSON_WHITESPACE = ' \t\n\r'
+REQUIRED_SECTION_INDICES = (79, 231)
+# Parsed sections keyed by (absolute path, mtime, size), so each cr.json is decoded at most once per run.
+_CR_SECTION_CACHE: Dict[Tuple[str, int, int], Tuple[List[str], List[str]]] = {}
+
+def iter_cr_sections(filepath: str) -> Iterator[Dict]:
+    """
+    Yields the section objects of a cr.json one at a time.
+    Why: The file is read in chunks and decoded object by object, so callers can stop as soon as
+         they have the sections they need instead of loading and decoding the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        buffer, pos, expected = "", 0, "["
+        while True:
+            while pos < len(buffer) and buffer[pos] in JSON_WHITESPACE: pos += 1
+            if pos < len(buffer) and expected == "[":
+                if buffer[pos] != "[": raise json.JSONDecodeError("Expected a list of sections", buffer, pos)
+                pos, expected = pos + 1, "section"
+                continue
+            if pos < len(buffer) and buffer[pos] == "]": return
+            if pos < len(buffer) and expected == ",":
+                if buffer[pos] != ",": raise json.JSONDecodeError("Expected ',' between sections", buffer, pos)
+                pos, expected = pos + 1, "section"
+                continue
+            try:
+                if pos == len(buffer): raise json.JSONDecodeError("Unexpected end of file", buffer, pos)
+                section, pos = decoder.raw_decode(buffer, pos)
+                expected = ","
+                yield section
+            except json.JSONDecodeError:
+                # Why: Growing the read size with the pending data keeps re-decoding of a large section linear.
+                profiler.count("read")
+                chunk = f.read(max(CR_READ_CHUNK_SIZE, len(buffer) - pos))
+                if not chunk: raise
+                buffer, pos = buffer[pos:] + chunk, 0
+
+def clear_cr_cache():
+    """Forgets all parsed cr.json sections, e.g. before a cold benchmark run."""
+    _CR_SECTION_CACHE.clear()
+
+def is_cr_file(filename: str) -> bool:
+    return filename.lower() == "cr.json" or bool(CR_TRANSLATION_PATTERN.match(filename))
+
+def find_translations(cr_json_path: str) -> Dict[str, str]:
+    """Returns the 'cr_<lang>.json' files next to a cr.json (which itself need not exist), keyed by language code."""
+    folder = os.path.dirname(cr_json_path)
+    profiler.count("listdir")
+    try:
+        filenames = sorted(os.listdir(folder or "."))
+    except OSError:
+        return {}
+    translations = {}
+    for filename in filenames:
+        match = CR_TRANSLATION_PATTERN.match(filename)
+        if match: translations.setdefault(match.group(1).lower(), os.path.join(folder, filename))
+    return translations
+
+def find_language_files(cr_json_path: str, default_lang: str) -> Dict[str, str]:
+    """
+    Returns the cr.json file of every available language, keyed by language code.
+    The default language (taken from cr.json itself) comes first, followed by the translations in alphabetical order.
+    """
+    language_files = {default_lang: cr_json_path} if os.path.exists(cr_json_path) else {}
+    for lang, path in find_translations(cr_json_path).items(): language_files.setdefault(lang, path)
+    # Without any file, cr.json is still tried so the usual warning is printed.
+    return language_files or {default_lang: cr_json_path}
+
+def lines_filename(lang: str, primary_lang: str) -> str:
+    """The first (normally the default) language is written to lines.json, every other language to lines_<lang>.json."""
+    return "lines.json" if lang == primary_lang else f"lines_{lang}.json"
+
 # --- HELPER FUNCTIONS ---
-def load_and_prepare_cr_data(filepath: str) -> Union[Tuple[List[str], List[str]], None]:
+def load_and_prepare_cr_data(filepath: str, quiet: bool = False) -> Union[Tuple[List[str], List[str]], None]:
+    profiler.count("stat")
     try:
-        with open(filepath, 'r', encoding='utf-8-sig') as f:
-            data = json.loads(f.read().replace(u'\u00A0', ' '))
-        section_79 = next(s['SectionString'] for s in data if s['SectionIndex'] == 79)
-        section_231 = next(s['SectionString'] for s in data if s['SectionIndex'] == 231)
-        return section_79, section_231
+        stat = os.stat(filepath)
+        cache_key = (os.path.abspath(filepath), stat.st_mtime_ns, stat.st_size)
+        if cache_key in _CR_SECTION_CACHE: return _CR_SECTION_CACHE[cache_key]
+        found_sections = {}
+        with closing(iter_cr_sections(filepath)) as sections:
+            for section in sections:
+                section_index = section['SectionIndex']
+                if section_index in REQUIRED_SECTION_INDICES and section_index not in found_sections:
+                    # Non-breaking spaces are normalized only in the strings that are actually kept.
+                    found_sections[section_index] = [line.replace(u'\u00A0', ' ') if isinstance(line, str) else line for line in section['SectionString']]
+                    if len(found_sections) == len(REQUIRED_SECTION_INDICES): break
+        missing_sections = [i for i in REQUIRED_SECTION_INDICES if i not in found_sections]
+        if missing_sections: raise StopIteration(f"Missing section(s): {missing_sections}")
+        _CR_SECTION_CACHE[cache_key] = (found_sections[79], found_sections[231])
+        return _CR_SECTION_CACHE[cache_key]
     except (FileNotFoundError, json.JSONDecodeError, StopIteration) as e:
-        print(f"  [Lines Generator] Warning: Could not load or find key sections in '{filepath}'. Details: {e}")
+        if not quiet: print(f"  [Lines Generator] Warning: Could not load or find key sections in '{filepath}'. Details: {e}")
         return None
 
-def parse_text_blocks(section_79, section_231) -> Union[List[Dict], None]:
+def parse_text_blocks(section_79, section_231, quiet: bool = False) -> Union[List[Dict], None]:
     try:
         desc_anchor_index = section_79.index(DESCRIPTION_BLOCK_ANCHOR)
         descriptions = section_79[desc_anchor_index + 1 : desc_anchor_index + 1 + NUM_AIS]
@@ -57,10 +148,10 @@ def parse_text_blocks(section_79, section_231) -> Union[List[Dict], None]:
             all_ai_data.append(ai_data)
         return all_ai_data
     except (ValueError, IndexError) as e:
-        print(f"  [Lines Generator] Error: Failed to parse data blocks. File structure may be invalid. Details: {e}")
+        if not quiet: print(f"  [Lines Generator] Error: Failed to parse data blocks. File structure may be invalid. Details: {e}")
         return None
 
-def write_formatted_lines_file(data: Dict, output_path: str):
+def write_formatted_lines_file(data: Dict, output: Union[str, TextIO]):
     max_key_len = max(len(k) for k in OUTPUT_KEYS_ORDER if k != 'newline')
     output_lines = ["{"]
     last_key = next(k for k in reversed(OUTPUT_KEYS_ORDER) if k != 'newline')
@@ -73,34 +164,70 @@ def write_formatted_lines_file(data: Dict, output_path: str):
         if key != last_key: line += ","
         output_lines.append(line)
     output_lines.append("}")
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("\n".join(output_lines))
+    write_text(output, "\n".join(output_lines))
 
 # --- MAIN ENTRY POINT ---
-def generate_lines_files(cr_json_path: str, existing_ai_folders: List[str], output_base_path: str) -> List[str]:
+def _match_slots(language_files: Dict[str, str], folder_matcher: FolderMatcher, quiet: bool = False) -> Iterator[Tuple[Dict[str, Dict], str, str, Union[str, None]]]:
+    """Yields (data per language, primary language, AI name, matching folder or None) for every AI slot of the parsed cr.json files."""
+    parsed_languages = {}
+    for lang, cr_json_path in language_files.items():
+        prepared_data = load_and_prepare_cr_data(cr_json_path, quiet)
+        parsed_ai_data = parse_text_blocks(prepared_data[0], prepared_data[1], quiet) if prepared_data else None
+        if parsed_ai_data: parsed_languages[lang] = parsed_ai_data
+    if not parsed_languages: return
+    primary_lang = next(iter(parsed_languages))
+
+    # Why: Every cr.json lists the same NUM_AIS lords in the same order, so each slot is matched to a folder once
+    #      and all of its translations go to that folder. Another language's name is only tried if the first one fails.
+    for slot in range(NUM_AIS):
+        slot_data = {lang: parsed_ai_data[slot] for lang, parsed_ai_data in parsed_languages.items()}
+        ai_name_from_cr, matching_folder = slot_data[primary_lang]['ai_name'], None
+        for ai_data in slot_data.values():
+            matching_folder = folder_matcher.match(ai_data['ai_name'])
+            if matching_folder:
+                ai_name_from_cr = ai_data['ai_name']
+                break
+        yield slot_data, primary_lang, ai_name_from_cr, matching_folder
+
+def match_lines_targets(language_files: Dict[str, str], folder_matcher: FolderMatcher) -> List[str]:
+    """
+    Returns the folders that generate_language_lines_files would write to, without writing or printing anything.
+    The parsed cr.json data is cached, so the later generation does not read the files again.
+    """
+    return list(dict.fromkeys(folder for _, _, _, folder in _match_slots(language_files, folder_matcher, quiet=True) if folder))
+
+def generate_lines_files(cr_json_path: str, existing_ai_folders: List[str], output_base_path: str,
+                         folder_matcher: Union[FolderMatcher, None] = None, output_layout: Union[OutputLayout, None] = None) -> List[str]:
     """
     Main entry point to process a cr.json file.
     Returns a list of folder names for which a lines.json was successfully created.
+    A prebuilt folder_matcher for existing_ai_folders can be passed in when several cr.json files are processed,
+    and an output_layout to write into per-character archives instead of folders below output_base_path.
     """
-    print(f"\n--- Running Lines Generator for: {os.path.basename(cr_json_path)} ---")
-    succeeded_folders = []
-    
-    prepared_data = load_and_prepare_cr_data(cr_json_path)
-    if not prepared_data: return succeeded_folders
-
-    parsed_ai_data = parse_text_blocks(prepared_data[0], prepared_data[1])
-    if not parsed_ai_data: return succeeded_folders
+    return list(generate_language_lines_files({"": cr_json_path}, existing_ai_folders, output_base_path, folder_matcher, output_layout))
 
-    for ai_data in parsed_ai_data:
-        ai_name_from_cr = ai_data['ai_name']
-        matching_folder = find_best_folder_match(ai_name_from_cr, existing_ai_folders)
+def generate_language_lines_files(language_files: Dict[str, str], existing_ai_folders: List[str], output_base_path: str,
+                                  folder_matcher: Union[FolderMatcher, None] = None, output_layout: Union[OutputLayout, None] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Processes the cr.json files of several languages (see find_language_files) in one pass.
+    Returns the folders that received lines, each with the lines file written per language.
+    """
+    print(f"\n--- Running Lines Generator for: {', '.join(os.path.basename(path) for path in language_files.values())} ---")
+    succeeded_folders = {}
+    folder_matcher = folder_matcher or FolderMatcher(existing_ai_folders)
+    output_layout = output_layout or OutputLayout(output_base_path)
 
+    for slot_data, primary_lang, ai_name_from_cr, matching_folder in _match_slots(language_files, folder_matcher):
         if matching_folder:
-            print(f"  - Processing '{ai_name_from_cr}': Matched to folder '{matching_folder}'.")
-            final_output_dir = os.path.join(output_base_path, matching_folder)
-            os.makedirs(final_output_dir, exist_ok=True)
-            write_formatted_lines_file(ai_data, os.path.join(final_output_dir, 'lines.json'))
-            succeeded_folders.append(matching_folder) # Track success
+            languages_note = f" Languages: {', '.join(slot_data)}." if len(slot_data) > 1 else ""
+            print(f"  - Processing '{ai_name_from_cr}': Matched to folder '{matching_folder}'.{languages_note}")
+            written_files = {}
+            with output_layout.open(matching_folder) as sink:
+                for lang, ai_data in slot_data.items():
+                    written_files[lang] = lines_filename(lang, primary_lang)
+                    with sink.open_text(written_files[lang]) as f:
+                        write_formatted_lines_file(ai_data, f)
+            succeeded_folders[matching_folder] = written_files # Track success
         else:
             print(f"  - Skipping '{ai_name_from_cr}': No matching character folder found.")
             
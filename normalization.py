@@ -0,0 +1,99 @@
+# normalization.py
+
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Tuple
+
+# --- NAME NORMALIZATION ---
+# Why: A single translate call transliterates the German umlauts and drops spaces in one pass over the name.
+#      Dropping spaces before the other special characters gives the same result, since both are plain deletions.
+TRANSLITERATION_TABLE = str.maketrans({'ä': 'ae', 'Ä': 'Ae', 'ö': 'oe', 'Ö': 'Oe', 'ü': 'ue', 'Ü': 'Ue', 'ß': 'ss', ' ': None})
+SPECIAL_CHARACTERS_PATTERN = re.compile(r'[^\w\s]')
+# Far more than the characters and cr.json names of a large project, so every name is sanitized only once.
+SANITIZE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
+def sanitize_name(name: str) -> str:
+    """
+    Sanitizes a string for use as a file or folder name.
+    Why: Ensures cross-system compatibility by replacing German umlauts and removing special characters.
+         The same names are sanitized again for planning, folder matching and the lines generator, so results are memoized.
+    """
+    if not name: return ""
+    # Why: This order of operations (transliterate, then remove others) is crucial for correctness.
+    return SPECIAL_CHARACTERS_PATTERN.sub('', name.translate(TRANSLITERATION_TABLE))
+
+
+# --- TABLE HELPERS ---
+
+def freeze(mapping: dict) -> Mapping:
+    """Returns a read-only view of a dictionary; nested dictionaries are frozen as well."""
+    return MappingProxyType({key: freeze(value) if isinstance(value, dict) else value for key, value in mapping.items()})
+
+def invert(mapping: Mapping[str, str]) -> Mapping[str, Tuple[str, ...]]:
+    """Returns the read-only reverse of a key → file mapping: every file with its keys, both in first-use order."""
+    keys_by_file = {}
+    for key, filename in mapping.items(): keys_by_file.setdefault(filename, []).append(key)
+    return MappingProxyType({filename: tuple(keys) for filename, keys in keys_by_file.items()})
+
+
+# --- NAME TABLES ---
+# Why: Centralizing this map ensures consistent translation across the entire application.
+GERMAN_TO_ENGLISH_NAMES = freeze({
+    "ratte": "rat", "schlange": "snake", "schwein": "pig", "wolf": "wolf", "saladin": "saladin",
+    "kalif": "caliph", "sultan": "sultan", "richard löwenherz": "richard", "richard": "richard",
+    "friedrich": "frederick", "kaiser friedrich": "frederick", "philipp": "phillip", "könig philipp": "phillip",
+    "wesir": "wazir", "emir": "emir", "nizar": "nizar", "sheriff": "sheriff", "marschall": "marshal",
+    "abt": "abbot", "könig": "king" # Added for cases like 'König' vs 'King Phillip'
+})
+ENGLISH_TO_GERMAN_NAMES = freeze({v: k for k, v in GERMAN_TO_ENGLISH_NAMES.items()})
+
+# This provides a reliable mapping from the fixed troop index to the vanilla AI name.
+TROOP_INDEX_TO_NAME = freeze({
+    "1": "Rat", "2": "Snake", "3": "Pig", "4": "Wolf", "5": "Saladin", "6": "Caliph", 
+    "7": "Sultan", "8": "Richard", "9": "Frederick", "10": "Phillip", "11": "Wazir", 
+    "12": "Emir", "13": "Nizar", "14": "Sheriff", "15": "Marshal", "16": "Abbot",
+})
+# This reverse map is needed to calculate asset numbers based on the vanilla AI name.
+NAME_TO_AI_INDEX = freeze({name: int(index) for index, name in TROOP_INDEX_TO_NAME.items()})
+
+
+# --- SPEECH CONFIGURATION ---
+LORD_PREFIX_MAP = freeze({
+    "Saladin": "sa", "Caliph": "ca", "Sultan": "su", "Richard": "ri", "Frederick": "fr", 
+    "Phillip": "ph", "Wazir": "wa", "Emir": "em", "Nizar": "ni", "Sheriff": "sh", 
+    "Marshal": "ma", "Abbot": "ab"
+})
+# The speech files of the first four lords that are not shared with the others.
+_LORD_SPEECH_FILES = {
+    "Rat": {"taunt_1": "rt_taunt_01.wav", "taunt_2": "rt_taunt_02.wav", "taunt_3": "rt_taunt_05.wav", "taunt_4": "rt_taunt_08.wav", "anger_1": "rt_anger_04.wav", "anger_2": "rt_anger_01.wav", "plead": "rt_plead_01.wav", "nervous_1": "rt_plead_04.wav", "nervous_2": "rt_plead_03.wav", "victory_1": "rt_vict_01.wav", "victory_2": "rt_vict_02.wav", "victory_3": "rt_vict_04.wav", "victory_4": "rt_vict_03.wav", "ally_death": "rt_anger_02.wav", "kick_player": "rt_kick_player.wav", "add_player": "rt_add_player.wav"},
+    "Snake": {"taunt_1": "sn_taunt_01.wav", "taunt_2": "sn_taunt_04.wav", "taunt_3": "sn_taunt_05.wav", "taunt_4": "sn_taunt_07.wav", "anger_1": "sn_anger_03.wav", "anger_2": "sn_anger_04.wav", "plead": "sn_plead_01.wav", "nervous_1": "sn_plead_04.wav", "nervous_2": "sn_plead_03.wav", "victory_1": "sn_vict_02.wav", "victory_2": "sn_taunt_03.wav", "victory_3": "sn_vict_03.wav", "victory_4": "sn_vict_04.wav", "ally_death": "all_ally_death_01.wav", "kick_player": "sn_kick_player.wav", "add_player": "sn_add_player.wav"},
+    "Pig": {"taunt_1": "pg_taunt_03.wav", "taunt_2": "pg_taunt_04.wav", "taunt_3": "pg_taunt_06.wav", "taunt_4": "pg_taunt_07.wav", "anger_1": "pg_anger_04.wav", "anger_2": "pg_anger_02.wav", "plead": "pg_plead_01.wav", "nervous_1": "pg_plead_03.wav", "nervous_2": "pg_plead_04.wav", "victory_1": "pg_vict_01.wav", "victory_2": "pg_vict_02.wav", "victory_3": "pg_vict_03.wav", "victory_4": "pg_taunt_02.wav", "ally_death": "pg_plead_02.wav", "kick_player": "pg_kick_player.wav", "add_player": "pg_add_player.wav"},
+    "Wolf": {"taunt_1": "wf_taunt_01.wav", "taunt_2": "wf_taunt_02.wav", "taunt_3": "wf_taunt_05.wav", "taunt_4": "wf_taunt_06.wav", "anger_1": "wf_anger_04.wav", "anger_2": "wf_anger_02.wav", "plead": "wf_plead_01.wav", "nervous_1": "wf_plead_03.wav", "nervous_2": "wf_plead_04.wav", "victory_1": "wf_vict_02.wav", "victory_2": "wf_taunt_04.wav", "victory_3": "wf_vict_01.wav", "victory_4": "all_vict_04.wav", "ally_death": "all_ally_death_01.wav", "kick_player": "wf_kick_player.wav", "add_player": "wf_add_player.wav"}
+}
+SHARED_FILES_FOR_FIRST_FOUR = freeze({ "request": "all_req_01.wav", "thanks": "all_thanks_01.wav", "congrats": "all_congrats_01.wav", "boast": "all_boast_01.wav", "help": "all_help_01.wav", "extra": "all_extra_01.wav", "siege": "all_siege_01.wav", "no_attack_1": "all_noattack_01.wav", "no_attack_2": "all_noattack_02.wav", "no_help_1": "all_nohelp_01.wav", "no_help_2": "all_nohelp_02.wav", "no_sent": "all_notsent_01.wav", "sent": "all_sent_01.wav", "team_winning": "all_team_winning_01.wav", "team_losing": "all_team_losing_01.wav", "help_sent": "all_helpsent_01.wav", "will_attack": "all_willattack_01.wav" })
+# Why: The shared files follow each lord's own files and never replace one of them; this order is the order of mapping.json.
+SPECIAL_SPEECH_MAP = freeze({lord: {**speech_files, **{key: filename for key, filename in SHARED_FILES_FOR_FIRST_FOUR.items() if key not in speech_files}}
+                             for lord, speech_files in _LORD_SPEECH_FILES.items()})
+# Each special lord's speech files with the mapping keys that use them, so every file is looked up only once.
+SPEECH_KEYS_BY_FILE = freeze({lord: invert(speech_map) for lord, speech_map in SPECIAL_SPEECH_MAP.items()})
+FILENAME_STEM_TO_KEY_MAP = freeze({ "taunt_01": "taunt_1", "taunt_02": "taunt_2", "taunt_03": "taunt_3", "taunt_04": "taunt_4", "anger_01": "anger_1", "anger_02": "anger_2", "plead_01": "plead", "nervous_01": "nervous_1", "nervous_02": "nervous_2", "vict_01": "victory_1", "vict_02": "victory_2", "vict_03": "victory_3", "vict_04": "victory_4", "req_01": "request", "thanks_01": "thanks", "ally_death_01": "ally_death", "congrats_01": "congrats", "boast_01": "boast", "help_01": "help", "extra_01": "extra", "kick_player_01": "kick_player", "add_player_01": "add_player", "siege_01": "siege", "noattack_01": "no_attack_1", "noattack_02": "no_attack_2", "nohelp_01": "no_help_1", "nohelp_02": "no_help_2", "notsent_01": "no_sent", "sent_01": "sent", "team_winning_01": "team_winning", "team_losing_01": "team_losing", "helpsent_01": "help_sent", "willattack_01": "will_attack" })
+
+# --- BINKS CONFIGURATION ---
+BINKS_CONFIG = freeze({
+    "Saladin": {"prefix": "saladin_"}, "Caliph": {"prefix": "bad_arab_"}, "Sultan": {"prefix": "sultan_"},
+    "Richard": {"prefix": "richard_"}, "Frederick": {"prefix": "fred_"}, "Phillip": {"prefix": "philip_"},
+    "Wazir": {"prefix": "vizir_"}, "Emir": {"prefix": "emir_"}, "Nizar": {"prefix": "nazir_"},
+    "Sheriff": {"prefix": "sheriff_"}, "Marshal": {"prefix": "ma_"}, "Abbot": {"prefix": "abbot_"},
+    "Rat": {"mapping": { "taunt_1": "rt_taunt2.bik", "taunt_2": "rt_taunt1.bik", "taunt_3": "rt_taunt2.bik", "taunt_4": "rt_taunt1.bik", "anger_1": "rt_anger1.bik", "anger_2": "rt_anger1.bik", "plead": "rt_plead1.bik", "nervous_1": "rt_plead2.bik", "nervous_2": "rt_plead3.bik", "victory_1": "rt_vict1.bik", "victory_2": "rt_vict1.bik", "victory_3": "rt_vict1.bik", "victory_4": "rt_vict1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "rt_anger1.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
+    "Snake": {"mapping": { "taunt_1": "sn_taunt1.bik", "taunt_2": "sn_taunt2.bik", "taunt_3": "sn_taunt1.bik", "taunt_4": "sn_taunt2.bik", "anger_1": "sn_anger1.bik", "anger_2": "sn_anger1.bik", "plead": "sn_plead2.bik", "nervous_1": "sn_plead2.bik", "nervous_2": "sn_plead2.bik", "victory_1": "sn_vict2.bik", "victory_2": "sn_vict1.bik", "victory_3": "sn_vict1.bik", "victory_4": "sn_taunt1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "bad_soldier_nevous.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
+    "Pig": {"mapping": { "taunt_1": "pg_taunt1.bik", "taunt_2": "pg_taunt2.bik", "taunt_3": "pg_taunt1.bik", "taunt_4": "pg_taunt2.bik", "anger_1": "pg_anger1.bik", "anger_2": "pg_anger1.bik", "plead": "pg_plead1.bik", "nervous_1": "pg_plead2.bik", "nervous_2": "pg_plead1.bik", "victory_1": "pg_vict1.bik", "victory_2": "pg_vict2.bik", "victory_3": "pg_vict3.bik", "victory_4": "pg_vict1.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "pg_plead1.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}},
+    "Wolf": {"mapping": { "taunt_1": "wf_taunt1.bik", "taunt_2": "wf_taunt2.bik", "taunt_3": "wf_taunt1.bik", "taunt_4": "wf_taunt2.bik", "anger_1": "wf_anger1.bik", "anger_2": "wf_anger1.bik", "plead": "wf_plead1.bik", "nervous_1": "wf_plead2.bik", "nervous_2": "wf_plead1.bik", "victory_1": "wf_vict1.bik", "victory_2": "wf_vict2.bik", "victory_3": "wf_vict1.bik", "victory_4": "bad_soldier_taunt.bik", "request": "bad_soldier_taunt.bik", "thanks": "bad_soldier_taunt.bik", "ally_death": "bad_soldier_nevous.bik", "congrats": "bad_soldier_taunt.bik", "boast": "bad_soldier_taunt.bik", "help": "bad_soldier_nevous.bik", "extra": "bad_soldier_taunt.bik", "siege": "bad_soldier_taunt.bik", "no_attack_1": "bad_soldier_nevous.bik", "no_attack_2": "bad_soldier_taunt.bik", "no_help_1": "bad_soldier_taunt.bik", "no_help_2": "bad_soldier_taunt.bik", "no_sent": "bad_soldier_taunt.bik", "sent": "bad_soldier_taunt.bik", "team_losing": "bad_soldier_nevous.bik", "team_winning": "bad_soldier_taunt.bik", "help_sent": "bad_soldier_taunt.bik", "will_attack": "bad_soldier_taunt.bik"}}
+})
+# Each of the first four lords' bink videos with the mapping keys that use them, in first-use order.
+BINKS_KEYS_BY_FILE = freeze({lord: invert(config["mapping"]) for lord, config in BINKS_CONFIG.items() if "mapping" in config})
+STANDARD_BINKS_MAPPING = freeze({ "taunt_1": "taunting", "taunt_2": "taunting", "taunt_3": "taunting", "taunt_4": "taunting", "anger_1": "nervous", "anger_2": "nervous", "plead": "nervous", "nervous_1": "nervous", "nervous_2": "anger", "victory_1": "natural", "victory_2": "taunting", "victory_3": "natural", "victory_4": "natural", "request": "natural", "thanks": "natural", "ally_death": "nervous", "congrats": "natural", "boast": "taunting", "help": "nervous", "extra": "natural", "siege": "taunting", "no_attack_1": "nervous", "no_attack_2": "nervous", "no_help_1": "nervous", "no_help_2": "nervous", "no_sent": "nervous", "sent": "natural", "team_losing": "nervous", "team_winning": "taunting", "help_sent": "natural", "will_attack": "natural" })
+# The bink moods of the standard lords, keyed by the file name suffixes that are in use.
+BINKS_MOOD_MAP = freeze({"anger": "anger", "angry": "anger", "taunt": "taunting", "taunting": "taunting", "confident": "taunting", "nervous": "nervous", "natural": "natural"})
@@ -0,0 +1,232 @@
+# output_sink.py
+
+import io
+import os
+import zipfile
+from typing import Union, Dict, List, TextIO
+
+import profiler
+from asset_linker import materialize_file
+from build_manifest import file_signature
+
+# --- CONSTANTS ---
+OUTPUT_FORMATS = ["folder", "zip"]
+# Why: Bink videos and PNG images are already compressed, so deflating them only costs CPU time.
+STORED_EXTENSIONS = {".bik", ".png"}
+# Why: Generated files get a fixed timestamp so identical inputs always produce identical archives.
+GENERATED_FILE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+# The block size used when members are moved inside an archive.
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+# --- FUNCTIONS ---
+
+def member_signature(archive: zipfile.ZipFile, name: str) -> Union[Dict, None]:
+    """Returns the size and CRC of an archive member, or None if it is missing."""
+    # Why: Members carry the fixed GENERATED_FILE_DATE_TIME or the source's timestamp, so the CRC identifies their content instead.
+    info = archive.NameToInfo.get(name)
+    return {"size": info.file_size, "crc": info.CRC} if info else None
+
+def write_text(output: Union[str, TextIO], text: str):
+    """Writes text either to a file path or to an already opened text stream (e.g. an archive member)."""
+    if isinstance(output, str):
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        output.write(text)
+
+def compress_type_for(filename: str) -> int:
+    """Picks the archive compression method based on the file type."""
+    return zipfile.ZIP_STORED if os.path.splitext(filename)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+class DirectorySink:
+    """Writes the output files of one character into its own folder."""
+
+    def __init__(self, root: str, link_mode: str = "copy", pool=None):
+        self.root = root
+        self.link_mode = link_mode
+        self.pool = pool
+        os.makedirs(root, exist_ok=True)
+
+    def describe(self, relpath: str) -> str:
+        return os.path.join(self.root, *relpath.split("/"))
+
+    def open_text(self, relpath: str) -> TextIO:
+        profiler.count("write")
+        path = self.describe(relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return open(path, 'w', encoding='utf-8')
+
+    def read_text(self, relpath: str) -> Union[str, None]:
+        path = self.describe(relpath)
+        profiler.count("exists")
+        if not os.path.exists(path): return None
+        profiler.count("read")
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def place_file(self, source_file: str, relpath: str) -> str:
+        """Copies or links an asset into the folder (via the asset pool, if one is used) and returns the method that was used."""
+        path = self.describe(relpath)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.pool: return self.pool.place(source_file, path)
+        return materialize_file(source_file, path, self.link_mode)
+
+    def file_signatures(self, relpaths: List[str]) -> Dict[str, Union[Dict, None]]:
+        """Returns the size and mtime of each written file, or None for a missing one."""
+        return {relpath: file_signature(self.describe(relpath)) for relpath in relpaths}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ZipSink:
+    """
+    Streams the output files of one character straight into a zip archive.
+    Why: Avoids writing thousands of small files only to pack them afterwards. Assets are copied into
+         the archive in chunks, so memory use stays bounded even for large bink videos.
+    """
+
+    def __init__(self, archive_path: str, folder_name: str, append: bool = False):
+        self.archive_path = archive_path
+        # Members are stored below the character folder, so extracting into resources/ai recreates the folder layout.
+        self.prefix = folder_name + "/"
+        os.makedirs(os.path.dirname(archive_path) or ".", exist_ok=True)
+        mode = 'a' if append and os.path.exists(archive_path) else 'w'
+        self.archive = zipfile.ZipFile(archive_path, mode)
+        # The byte ranges of replaced members, which are cut out of the archive when it is closed.
+        self.gaps = []
+
+    def describe(self, relpath: str) -> str:
+        return f"{self.archive_path}:{self.prefix}{relpath}"
+
+    def _member_name(self, relpath: str) -> str:
+        return self.prefix + relpath.replace(os.sep, "/")
+
+    def _remove_member(self, name: str):
+        # Why: Zip archives cannot overwrite a member in place, so the old member is only dropped from the index here
+        #      and its bytes are remembered as a gap that close() removes once.
+        info = self.archive.NameToInfo.pop(name)
+        self.archive.filelist.remove(info)
+        later_offsets = [other.header_offset for other in self.archive.filelist if other.header_offset > info.header_offset]
+        self.gaps.append((info.header_offset, min(later_offsets + [self.archive.start_dir])))
+
+    def _prepare_member(self, relpath: str) -> str:
+        name = self._member_name(relpath)
+        if name in self.archive.NameToInfo: self._remove_member(name)
+        return name
+
+    def _compact(self):
+        """
+        Closes the gaps left by replaced members by moving every member behind the first gap forward.
+        Why: The lines files and meta.json are written after the assets, so replacing them on incremental runs
+             only moves the end of the archive instead of copying every bink and WAV file again.
+        """
+        archive = self.archive
+        cut = min(start for start, _ in self.gaps)
+        boundaries = sorted([info.header_offset for info in archive.filelist] + [start for start, _ in self.gaps] + [archive.start_dir])
+        position = cut
+        for info in sorted((info for info in archive.filelist if info.header_offset > cut), key=lambda info: info.header_offset):
+            start = info.header_offset
+            end = next(boundary for boundary in boundaries if boundary > start)
+            info.header_offset = position
+            # Members only ever move towards the start, so copying chunk by chunk never overwrites unread bytes.
+            while start < end:
+                archive.fp.seek(start)
+                chunk = archive.fp.read(min(COPY_CHUNK_SIZE, end - start))
+                archive.fp.seek(position)
+                archive.fp.write(chunk)
+                start += len(chunk)
+                position += len(chunk)
+        archive.fp.truncate(position)
+        archive.start_dir = position
+        archive._didModify = True
+        self.gaps = []
+
+    def open_text(self, relpath: str) -> TextIO:
+        profiler.count("write")
+        info = zipfile.ZipInfo(self._prepare_member(relpath), date_time=GENERATED_FILE_DATE_TIME)
+        info.compress_type = compress_type_for(relpath)
+        return io.TextIOWrapper(self.archive.open(info, 'w'), encoding='utf-8')
+
+    def read_text(self, relpath: str) -> Union[str, None]:
+        name = self._member_name(relpath)
+        if name not in self.archive.NameToInfo: return None
+        profiler.count("read")
+        with io.TextIOWrapper(self.archive.open(name), encoding='utf-8') as f:
+            return f.read()
+
+    def place_file(self, source_file: str, relpath: str) -> str:
+        """Streams an asset into the archive and returns the compression method that was used."""
+        compress_type = compress_type_for(relpath)
+        self.archive.write(source_file, self._prepare_member(relpath), compress_type=compress_type)
+        return "zip-stored" if compress_type == zipfile.ZIP_STORED else "zip-deflated"
+
+    def file_signatures(self, relpaths: List[str]) -> Dict[str, Union[Dict, None]]:
+        """Returns the size and CRC of each written member, or None for a missing one."""
+        return {relpath: member_signature(self.archive, self._member_name(relpath)) for relpath in relpaths}
+
+    def close(self):
+        if self.gaps: self._compact()
+        self.archive.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OutputLayout:
+    """Knows where and in which format the output of each character is written."""
+
+    def __init__(self, base_dir: str, output_format: str = "folder", link_mode: str = "copy", pool=None):
+        self.base_dir = base_dir
+        self.output_format = output_format
+        self.link_mode = link_mode
+        # Why: Archives cannot share content with each other, so the asset pool only applies to folder output.
+        self.pool = pool if output_format == "folder" else None
+
+    def location(self, folder_name: str) -> str:
+        """Returns the folder or archive path that holds the output of a character."""
+        if self.output_format == "zip":
+            return os.path.join(self.base_dir, folder_name + ".zip")
+        return os.path.join(self.base_dir, folder_name)
+
+    def open(self, folder_name: str, append: bool = True) -> Union[DirectorySink, ZipSink]:
+        """Opens the output of a character. With append=False an existing archive is started from scratch."""
+        if self.output_format == "zip":
+            return ZipSink(self.location(folder_name), folder_name, append)
+        return DirectorySink(self.location(folder_name), self.link_mode, self.pool)
+
+    def has_file(self, folder_name: str, relpath: str) -> bool:
+        """Checks whether a character's output already contains a file, without modifying anything."""
+        location = self.location(folder_name)
+        profiler.count("exists")
+        if self.output_format == "zip":
+            if not os.path.exists(location): return False
+            try:
+                with zipfile.ZipFile(location) as archive:
+                    return f"{folder_name}/{relpath}" in archive.NameToInfo
+            except zipfile.BadZipFile:
+                return False
+        return os.path.exists(os.path.join(location, relpath))
+
+    def file_signatures(self, folder_name: str, relpaths: List[str]) -> Dict[str, Union[Dict, None]]:
+        """Returns the signature of each file of a character's output (None if missing), without modifying anything."""
+        location = self.location(folder_name)
+        if self.output_format == "zip":
+            profiler.count("exists")
+            try:
+                with zipfile.ZipFile(location) as archive:
+                    return {relpath: member_signature(archive, f"{folder_name}/{relpath}") for relpath in relpaths}
+            except (OSError, zipfile.BadZipFile):
+                return dict.fromkeys(relpaths)
+        return {relpath: file_signature(os.path.join(location, *relpath.split("/"))) for relpath in relpaths}
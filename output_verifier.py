@@ -0,0 +1,135 @@
+# output_verifier.py
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union, Dict, List, Tuple
+
+import profiler
+from build_manifest import hash_file
+
+# --- CONSTANTS ---
+CHECKSUM_CACHE_VERSION = 1
+CHECKSUM_CACHE_FILENAME = "ai_checksum_cache.json"
+MAPPING_FILES = {"aiv": "aiv/mapping.json", "speech": "speech/mapping.json", "binks": "binks/mapping.json"}
+
+
+class ChecksumCache:
+    """
+    Remembers the SHA-1 of files keyed by their size and modification time.
+    Why: Verifying an unchanged tree again only needs one stat per file instead of reading every byte.
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List] = {}
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if stored.get("version") == CHECKSUM_CACHE_VERSION: self._entries = stored["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def sha1(self, path: str) -> str:
+        key = os.path.abspath(path)
+        profiler.count("stat")
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            with self._lock: self.hits += 1
+            return entry[2]
+        digest = hash_file(path)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        temp_path = self.cache_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CHECKSUM_CACHE_VERSION, "files": self._entries}, f)
+        os.replace(temp_path, self.cache_path)
+
+
+# --- HELPER FUNCTIONS ---
+
+def _load_json(path: str) -> Union[Dict, None]:
+    if not os.path.isfile(path): return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# --- CHECKS ---
+
+def check_folder(folder_path: str) -> List[str]:
+    """Checks that every mapping entry of a character folder points to a file, and that meta.json reports what is present."""
+    try:
+        meta = _load_json(os.path.join(folder_path, "meta.json"))
+        character = _load_json(os.path.join(folder_path, "character.json")) or {}
+    except ValueError as e:
+        return [f"Invalid JSON: {e}"]
+    if meta is None: return ["meta.json is missing"]
+
+    problems, present = [], {}
+    for stage, relpath in MAPPING_FILES.items():
+        mapping_path = os.path.join(folder_path, *relpath.split("/"))
+        try:
+            mapping = _load_json(mapping_path)
+        except ValueError as e:
+            problems.append(f"{relpath} is not valid JSON: {e}")
+            mapping = None
+        present[stage] = bool(mapping)
+        for key, filename in (mapping or {}).items():
+            if not os.path.isfile(os.path.join(os.path.dirname(mapping_path), filename)):
+                problems.append(f"{relpath}: '{key}' points to the missing file '{filename}'")
+    present["portrait"] = any(os.path.isfile(os.path.join(folder_path, name)) for name in ("portrait.png", "portrait_small.png"))
+    present["lines"] = os.path.isfile(os.path.join(folder_path, "lines.json"))
+    present["aic"] = bool(character.get("aic"))
+    present["lord"] = bool(character.get("lord"))
+    present["startTroops"] = any((character.get("startTroops") or {}).values())
+
+    switched = meta.get("switched", {})
+    for flag, is_present in present.items():
+        if bool(switched.get(flag)) != is_present:
+            problems.append(f"meta.json: switched.{flag} is {switched.get(flag)}, but the folder {'contains' if is_present else 'does not contain'} it")
+    return problems
+
+def check_mapping(folder_path: str, relpath: str, expected: Dict) -> List[str]:
+    """Checks that a mapping file still matches the mapping the current inputs would produce."""
+    try:
+        mapping = _load_json(os.path.join(folder_path, *relpath.split("/")))
+    except ValueError:
+        return []  # Already reported by check_folder.
+    if mapping is None: return [f"{relpath} is missing"]
+    return [] if mapping == expected else [f"{relpath} differs from the mapping of the current inputs"]
+
+def compare_assets(pairs: List[Tuple[str, str, str]], checksums: ChecksumCache, workers: int) -> Dict[str, List[str]]:
+    """
+    Compares (group, source, target) file pairs: first by existence and size, then by content hash.
+    Hashes are computed in parallel, and each distinct file is hashed at most once.
+    """
+    problems: Dict[str, List[str]] = {}
+    to_hash = []
+    for group, source_file, target_file in pairs:
+        try:
+            source_size, target_size = os.path.getsize(source_file), os.path.getsize(target_file)
+        except OSError:
+            problems.setdefault(group, []).append(f"'{target_file}' or its source '{source_file}' is missing")
+            continue
+        if source_size != target_size:
+            problems.setdefault(group, []).append(f"'{target_file}' has {target_size} bytes, but its source '{source_file}' has {source_size} (truncated?)")
+        elif not os.path.samefile(source_file, target_file):  # Hardlinks and symlinks need no hashing.
+            to_hash.append((group, source_file, target_file))
+
+    paths = sorted({path for _, source_file, target_file in to_hash for path in (source_file, target_file)})
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        digests = dict(zip(paths, executor.map(checksums.sha1, paths)))
+    for group, source_file, target_file in to_hash:
+        if digests[source_file] != digests[target_file]:
+            problems.setdefault(group, []).append(f"'{target_file}' differs from its source '{source_file}'")
+    return problems
@@ -0,0 +1,173 @@
+# profiler.py
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Union, Callable, Dict
+
+# --- GLOBAL STATE ---
+# Why: Instrumented call sites only check this module variable, so the overhead with '--profile' off is a single lookup.
+_ACTIVE = None
+
+
+class Profiler:
+    """
+    Collects wall times, file counts, bytes moved and file system operation counts for one conversion run.
+    Phases are recorded by the main thread; per-character stages may run on worker threads and are tracked thread-locally.
+    Files are counted towards the phases and stage of the thread that records them; work handed to another thread
+    is wrapped with bind(), so it still counts towards the phase and stage that started it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.started = time.perf_counter()
+        self.phases: Dict[str, Dict] = {}
+        self.characters: Dict[str, Dict[str, Dict]] = {}
+        self.asset_types: Dict[str, Dict] = {}
+        self.operations = Counter()
+        self.total_files = 0
+        self.total_bytes = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measures a phase of main(); a phase entered several times accumulates its totals."""
+        # Why: Taking global deltas would also count files that worker threads place for an earlier phase meanwhile.
+        with self._lock:
+            entry = self.phases.setdefault(name, {"seconds": 0.0, "files": 0, "bytes": 0, "calls": 0})
+        previous = getattr(self._local, "phases", ())
+        self._local.phases = previous + (entry,)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._local.phases = previous
+            with self._lock:
+                entry["seconds"] += time.perf_counter() - start
+                entry["calls"] += 1
+
+    @contextmanager
+    def track(self, character: str, stage: str):
+        """Attributes the time and all files placed by the current thread (or by work it hands off with bind()) to one stage of one character."""
+        entry = {"seconds": 0.0, "files": 0, "bytes": 0}
+        previous, self._local.entry = getattr(self._local, "entry", None), entry
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry["seconds"] = time.perf_counter() - start
+            self._local.entry = previous
+            with self._lock:
+                self.characters.setdefault(character, {})[stage] = entry
+
+    def bind(self, func: Callable) -> Callable:
+        """Wraps func so that the files it records count towards the current phases and stage, on whichever thread it runs."""
+        phases, entry = getattr(self._local, "phases", ()), getattr(self._local, "entry", None)
+
+        def bound(*args, **kwargs):
+            previous = getattr(self._local, "phases", ()), getattr(self._local, "entry", None)
+            self._local.phases, self._local.entry = phases, entry
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.phases, self._local.entry = previous
+        return bound
+
+    def count(self, operation: str, amount: int = 1):
+        with self._lock:
+            self.operations[operation] += amount
+
+    def record_file(self, source_file: str, seconds: float):
+        """Records one placed asset file for the current stage, its asset type and the overall totals."""
+        size = os.path.getsize(source_file)
+        extension = os.path.splitext(source_file)[1].lower() or "(none)"
+        # Why: With bind(), several copy threads may record files for the same stage at once.
+        stage = getattr(self._local, "entry", None)
+        entries = getattr(self._local, "phases", ()) + ((stage,) if stage is not None else ())
+        with self._lock:
+            for entry in entries:
+                entry["files"] += 1
+                entry["bytes"] += size
+            self.total_files += 1
+            self.total_bytes += size
+            asset_type = self.asset_types.setdefault(extension, {"seconds": 0.0, "files": 0, "bytes": 0})
+            asset_type["seconds"] += seconds
+            asset_type["files"] += 1
+            asset_type["bytes"] += size
+
+    def report(self) -> Dict:
+        """Builds the machine-readable report."""
+        characters = []
+        for name, stages in self.characters.items():
+            characters.append({
+                "character": name,
+                "seconds": sum(s["seconds"] for s in stages.values()),
+                "files": sum(s["files"] for s in stages.values()),
+                "bytes": sum(s["bytes"] for s in stages.values()),
+                "stages": stages,
+            })
+        characters.sort(key=lambda c: c["seconds"], reverse=True)
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "total_files": self.total_files,
+            "total_bytes": self.total_bytes,
+            "phases": self.phases,
+            "operations": dict(sorted(self.operations.items())),
+            "asset_types": dict(sorted(self.asset_types.items(), key=lambda item: item[1]["seconds"], reverse=True)),
+            "characters": characters,
+        }
+
+    def write_report(self, output_path: str, top_n: int = 10) -> Dict:
+        """Writes the JSON report and prints a short summary of the slowest phases, characters and asset types."""
+        report = self.report()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\n--- Profile ({report['total_seconds']:.3f}s, {report['total_files']} files, {report['total_bytes'] / 1024 / 1024:.1f} MiB) ---")
+        for name, phase in report["phases"].items():
+            print(f"  {name:<24} {phase['seconds']:8.3f}s  {phase['files']:6d} files  {phase['bytes'] / 1024 / 1024:9.1f} MiB")
+        print(f"  Slowest characters (top {top_n}):")
+        for character in report["characters"][:top_n]:
+            slowest_stage = max(character["stages"].items(), key=lambda item: item[1]["seconds"])[0] if character["stages"] else "-"
+            print(f"    {character['character']:<32} {character['seconds']:8.3f}s  {character['files']:5d} files  (slowest: {slowest_stage})")
+        print(f"  Slowest asset types (top {top_n}):")
+        for extension, asset_type in list(report["asset_types"].items())[:top_n]:
+            print(f"    {extension:<8} {asset_type['seconds']:8.3f}s  {asset_type['files']:6d} files  {asset_type['bytes'] / 1024 / 1024:9.1f} MiB")
+        print("  File system operations: " + ", ".join(f"{op}: {n}" for op, n in report["operations"].items()))
+        print(f"Profile report written to '{output_path}'.")
+        return report
+
+
+# --- MODULE-LEVEL HELPERS ---
+# These are cheap no-ops while profiling is disabled.
+
+def enable() -> Profiler:
+    global _ACTIVE
+    _ACTIVE = Profiler()
+    return _ACTIVE
+
+def disable():
+    global _ACTIVE
+    _ACTIVE = None
+
+def active() -> Union[Profiler, None]:
+    return _ACTIVE
+
+def count(operation: str, amount: int = 1):
+    if _ACTIVE is not None: _ACTIVE.count(operation, amount)
+
+@contextmanager
+def _no_op():
+    yield
+
+def phase(name: str):
+    return _ACTIVE.phase(name) if _ACTIVE is not None else _no_op()
+
+def track(character: str, stage: str):
+    return _ACTIVE.track(character, stage) if _ACTIVE is not None else _no_op()
+
+def bind(func: Callable) -> Callable:
+    return _ACTIVE.bind(func) if _ACTIVE is not None else func
@@ -0,0 +1,74 @@
+# sharding.py
+
+import os
+import re
+import json
+import zlib
+import argparse
+from typing import Dict, List, Tuple
+
+# --- CONSTANTS ---
+SHARD_STATUS_VERSION = 1
+SHARD_STATUS_PATTERN = re.compile(r"^ai_shard_(\d+)_of_(\d+)\.json$")
+
+
+# --- FUNCTIONS ---
+
+def parse_shard_spec(value: str) -> Tuple[int, int]:
+    """Parses a '--shard K/N' value (1 <= K <= N) for argparse."""
+    match = re.fullmatch(r"(\d+)/(\d+)", value.strip())
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected K/N with 1 <= K <= N (e.g. 2/4)")
+    return int(match.group(1)), int(match.group(2))
+
+def select_shard(aic_files: List[str], shard: Tuple[int, int]) -> List[str]:
+    """
+    Returns the AIC files that belong to shard K of N, keeping their order.
+    Why: The assignment only depends on the file name (not on listing order, host or Python's hash seed),
+         so every build node picks the same subset and each AIC file is converted by exactly one node.
+    """
+    index, count = shard
+    return [f for f in aic_files if zlib.crc32(f.encode('utf-8')) % count == index - 1]
+
+def shard_status_path(output_base: str, shard: Tuple[int, int]) -> str:
+    return os.path.join(output_base, f"ai_shard_{shard[0]}_of_{shard[1]}.json")
+
+def write_shard_status(output_base: str, shard: Tuple[int, int], plan: Dict, processed_chars: Dict[str, dict], output_format: str):
+    """Writes the partial status manifest of one shard: its AIC files, their character folders and their status."""
+    status = {
+        "version": SHARD_STATUS_VERSION,
+        "shard": list(shard),
+        "output_format": output_format,
+        "aic_files": {aic_entry["file"]: aic_entry["characters"] for aic_entry in plan["aic_files"]},
+        # The copy log only matters on the node that placed the files, so it is not carried over.
+        "characters": {folder_name: {k: v for k, v in char_info.items() if k != "copied_files"} for folder_name, char_info in processed_chars.items()},
+    }
+    path = shard_status_path(output_base, shard)
+    os.makedirs(output_base or ".", exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(status, f, indent=2, ensure_ascii=False)
+    print(f"\nShard {shard[0]}/{shard[1]} status written to '{path}'.")
+
+def load_shard_statuses(output_base: str) -> List[Dict]:
+    """
+    Loads the status manifests of all shards from the output folder, ordered by shard number.
+    Raises ValueError if the set of shards is incomplete or inconsistent.
+    """
+    statuses = {}
+    for filename in sorted(os.listdir(output_base)) if os.path.isdir(output_base) else []:
+        if not SHARD_STATUS_PATTERN.match(filename): continue
+        with open(os.path.join(output_base, filename), 'r', encoding='utf-8') as f:
+            status = json.load(f)
+        if status.get("version") != SHARD_STATUS_VERSION:
+            raise ValueError(f"'{filename}' was written by an incompatible version of the converter.")
+        statuses[tuple(status["shard"])] = status
+    if not statuses:
+        raise ValueError(f"No shard status files (ai_shard_K_of_N.json) found in '{output_base}'.")
+    counts = {count for _, count in statuses}
+    if len(counts) != 1:
+        raise ValueError(f"Shard status files from different shard counts found: {sorted(counts)}.")
+    count = counts.pop()
+    missing = [index for index in range(1, count + 1) if (index, count) not in statuses]
+    if missing:
+        raise ValueError(f"Missing the output of shard(s) {', '.join(f'{i}/{count}' for i in missing)}.")
+    return [statuses[(index, count)] for index in range(1, count + 1)]
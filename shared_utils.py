@@ -1,71 +1,102 @@
 # shared_utils.py
 
 import os
-import re
 from difflib import SequenceMatcher
+from functools import lru_cache
 from typing import Union
 
+from normalization import GERMAN_TO_ENGLISH_NAMES, ENGLISH_TO_GERMAN_NAMES, sanitize_name
+
 # --- CONSTANTS ---
-# Why: Centralizing this map ensures consistent translation across the entire application.
-GERMAN_TO_ENGLISH_NAMES = {
-    "ratte": "rat", "schlange": "snake", "schwein": "pig", "wolf": "wolf", "saladin": "saladin",
-    "kalif": "caliph", "sultan": "sultan", "richard löwenherz": "richard", "richard": "richard",
-    "friedrich": "frederick", "kaiser friedrich": "frederick", "philipp": "phillip", "könig philipp": "phillip",
-    "wesir": "wazir", "emir": "emir", "nizar": "nizar", "sheriff": "sheriff", "marschall": "marshal",
-    "abt": "abbot", "könig": "king" # Added for cases like 'König' vs 'King Phillip'
-}
-ENGLISH_TO_GERMAN_NAMES = {v: k for k, v in GERMAN_TO_ENGLISH_NAMES.items()}
+# A fuzzy match must have more than this many common characters in a row.
+FUZZY_MIN_MATCH_LENGTH = 3
 
 
 # --- FUNCTIONS ---
 
-def sanitize_name(name: str) -> str:
+def name_variations(name: str) -> set:
+    """Returns the lowercase name together with its German or English translation, if one is known."""
+    clean_original = name.lower().strip()
+    variations = {clean_original}
+    if clean_original in GERMAN_TO_ENGLISH_NAMES:
+        variations.add(GERMAN_TO_ENGLISH_NAMES[clean_original])
+    if clean_original in ENGLISH_TO_GERMAN_NAMES:
+        variations.add(ENGLISH_TO_GERMAN_NAMES[clean_original])
+    return variations
+
+
+class FolderMatcher:
     """
-    Sanitizes a string for use as a file or folder name.
-    Why: Ensures cross-system compatibility by replacing German umlauts and removing special characters.
+    Matches names against a fixed list of folders using the same strategies as find_best_folder_match.
+    Why: Built once per folder list, it precomputes the lowercase folder keys and an n-gram index, so each
+         lookup is a dictionary access or a fuzzy comparison against a few candidates instead of every folder.
     """
-    if not name: return ""
-    # Why: This order of operations (transliterate, then remove others) is crucial for correctness.
-    name = name.replace('ä', 'ae').replace('Ä', 'Ae')
-    name = name.replace('ö', 'oe').replace('Ö', 'Oe')
-    name = name.replace('ü', 'ue').replace('Ü', 'Ue')
-    name = name.replace('ß', 'ss')
-    sane_name = re.sub(r'[^\w\s]', '', name)
-    return sane_name.replace(' ', '')
 
+    def __init__(self, existing_folders: list):
+        self.folders = list(existing_folders)
+        self._first_index_by_key = {}
+        self._folders_by_ngram = {}
+        self._cache = {}
+        for i, folder in enumerate(self.folders):
+            clean_folder = folder.lower()
+            self._first_index_by_key.setdefault(clean_folder, i)
+            for ngram in self._ngrams(clean_folder):
+                self._folders_by_ngram.setdefault(ngram, set()).add(i)
+
+    @staticmethod
+    def _ngrams(text: str) -> set:
+        # Why: A fuzzy match needs more than FUZZY_MIN_MATCH_LENGTH common characters in a row,
+        #      so any folder that qualifies must share at least one n-gram of that length + 1.
+        size = FUZZY_MIN_MATCH_LENGTH + 1
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def match(self, name_to_match: str) -> Union[str, None]:
+        """Returns the best matching folder for a name, caching the result per name."""
+        if name_to_match not in self._cache:
+            self._cache[name_to_match] = self._find(name_to_match)
+        return self._cache[name_to_match]
+
+    def _find(self, name_to_match: str) -> Union[str, None]:
+        # Strategy 1: Direct match on the sanitized name.
+        sanitized_target = sanitize_name(name_to_match).lower()
+        if sanitized_target in self._first_index_by_key:
+            return self.folders[self._first_index_by_key[sanitized_target]]
+
+        # Strategy 2: Match on language variations; the earliest folder in the list wins, as in a linear scan.
+        matched_indices = [self._first_index_by_key[v] for v in name_variations(name_to_match) if v in self._first_index_by_key]
+        if matched_indices:
+            return self.folders[min(matched_indices)]
+
+        # Strategy 3: Fuzzy matching, restricted to folders sharing an n-gram and visited in list order
+        #             so ties are still resolved in favour of the first folder.
+        candidates = set()
+        for ngram in self._ngrams(sanitized_target):
+            candidates.update(self._folders_by_ngram.get(ngram, ()))
+        best_match_folder = None
+        max_match_length = FUZZY_MIN_MATCH_LENGTH
+        for i in sorted(candidates):
+            clean_folder = self.folders[i].lower()
+            matcher = SequenceMatcher(None, sanitized_target, clean_folder)
+            match = matcher.find_longest_match(0, len(sanitized_target), 0, len(clean_folder))
+            if match.size > max_match_length:
+                max_match_length = match.size
+                best_match_folder = self.folders[i]
+        return best_match_folder
+
+
+@lru_cache(maxsize=32)
+def _cached_folder_matcher(existing_folders: tuple) -> FolderMatcher:
+    return FolderMatcher(existing_folders)
+
+def clear_folder_matcher_cache():
+    """Forgets the matchers cached by find_best_folder_match, e.g. before a cold benchmark run."""
+    _cached_folder_matcher.cache_clear()
 
 def find_best_folder_match(name_to_match: str, existing_folders: list) -> Union[str, None]:
     """
     Finds the best matching folder using a multi-step, robust strategy.
     Why: This function provides a single source of truth for all name matching, ensuring
          that direct, sanitized, translated, and fuzzy matches are handled consistently.
+         Callers that match many names against the same folders should build a FolderMatcher once instead.
     """
-    # Strategy 1: Direct match on the sanitized name. (e.g., "König" -> "koenig" matches "Koenig" folder)
-    sanitized_target = sanitize_name(name_to_match).lower()
-    for folder in existing_folders:
-        if folder.lower() == sanitized_target:
-            return folder
-
-    # Strategy 2: Match on language variations of the original name. (e.g., "Ratte" matches "Rat" folder)
-    clean_original = name_to_match.lower().strip()
-    variations = {clean_original}
-    if clean_original in GERMAN_TO_ENGLISH_NAMES:
-        variations.add(GERMAN_TO_ENGLISH_NAMES[clean_original])
-    if clean_original in ENGLISH_TO_GERMAN_NAMES:
-        variations.add(ENGLISH_TO_GERMAN_NAMES[clean_original])
-    for folder in existing_folders:
-        if folder.lower() in variations:
-            return folder
-
-    # Strategy 3: Fallback to fuzzy matching using the sanitized name.
-    best_match_folder = None
-    max_match_length = 3  # A match must have at least 4 common characters.
-    for folder in existing_folders:
-        clean_folder = folder.lower()
-        matcher = SequenceMatcher(None, sanitized_target, clean_folder)
-        match = matcher.find_longest_match(0, len(sanitized_target), 0, len(clean_folder))
-        if match.size > max_match_length:
-            max_match_length = match.size
-            best_match_folder = folder
-            
-    return best_match_folder
\ No newline at end of file
+    return _cached_folder_matcher(tuple(existing_folders)).match(name_to_match)
\ No newline at end of file
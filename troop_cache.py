@@ -0,0 +1,57 @@
+# troop_cache.py
+
+import os
+import pickle
+from typing import Union, Dict, List, Tuple
+
+import profiler
+from build_manifest import hash_file
+
+# --- CONSTANTS ---
+# Why: Bumping this version invalidates existing caches, e.g. when the normalized troop structure changes.
+TROOP_CACHE_VERSION = 1
+TROOP_CACHE_FILENAME = "ai_troop_cache.pickle"
+
+
+# --- FUNCTIONS ---
+
+def source_key(troops_path: str) -> List[Tuple[str, int, int]]:
+    """
+    Returns the (filename, mtime, size) of every troop JSON file, in listing order.
+    Why: The listing order decides which file wins when two files define the same lord, so it is part of the key.
+    """
+    profiler.count("listdir")
+    key = []
+    for filename in os.listdir(troops_path):
+        if not filename.endswith('.json'): continue
+        profiler.count("stat")
+        stat = os.stat(os.path.join(troops_path, filename))
+        key.append((filename, stat.st_mtime_ns, stat.st_size))
+    return key
+
+def content_key(troops_path: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    Returns the (filename, SHA-1) of every troop JSON file, in listing order.
+    Why: Copies of the same troop files in different projects have different modification times but the same key.
+    """
+    profiler.count("listdir")
+    return tuple((filename, hash_file(os.path.join(troops_path, filename))) for filename in os.listdir(troops_path) if filename.endswith('.json'))
+
+def load(cache_path: str, key: List[Tuple[str, int, int]]) -> Union[Dict, None]:
+    """Returns the cached troop data if it was built from exactly these troop files, otherwise None."""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("version") != TROOP_CACHE_VERSION or cached.get("key") != key:
+        return None
+    return cached["troops"]
+
+def save(cache_path: str, key: List[Tuple[str, int, int]], troops: Dict):
+    """Atomically writes the troop data together with the key of the troop files it was built from."""
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    temp_path = cache_path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump({"version": TROOP_CACHE_VERSION, "key": key, "troops": troops}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, cache_path)
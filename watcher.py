@@ -0,0 +1,55 @@
+# watcher.py
+
+import os
+import stat
+from typing import Dict, List, Tuple
+
+import profiler
+
+
+def is_within(path: str, root: str) -> bool:
+    """Checks whether a (normalized) path is the given folder or lies anywhere below it."""
+    root = os.path.normpath(root)
+    return path == root or path.startswith(root + os.sep)
+
+
+class TreeWatcher:
+    """
+    Detects added, removed and modified files and folders below a set of paths by polling their stat data.
+    Why: Polling needs no third-party packages and works the same on every platform; one pass only
+         stats the watched trees, which is far cheaper than a conversion run.
+    """
+
+    def __init__(self, paths: List[str]):
+        self.paths = [os.path.normpath(p) for p in paths]
+        self.snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        state = {}
+        pending = list(self.paths)
+        while pending:
+            path = pending.pop()
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            state[path] = (info.st_mtime_ns, info.st_size)
+            if not stat.S_ISDIR(info.st_mode): continue
+            profiler.count("scandir")
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir(): pending.append(entry.path)
+                        else:
+                            entry_info = entry.stat()
+                            state[entry.path] = (entry_info.st_mtime_ns, entry_info.st_size)
+            except OSError:
+                continue
+        return state
+
+    def poll(self) -> List[str]:
+        """Returns all paths that were added, removed or modified since the previous poll."""
+        current = self._scan()
+        changed = sorted(p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p))
+        self.snapshot = current
+        return changed